@@ -0,0 +1,77 @@
+import threading
+from agents.ppo import Agent
+from profiler import Profiler
+
+
+class AsyncLearner:
+    # Double-buffered actor/learner split around an Agent. Actions are chosen
+    # by a copy of the agent (the policy) that records the rollout in its own
+    # buffer, while the agent itself learns from the previous rollout in a
+    # background thread. Buffers and weights only change hands in
+    # end_rollout(), so the policy never sees a half-updated network.
+    def __init__(self, agent, profiler=None):
+        self.agent = agent
+        self.profiler = profiler or Profiler()
+        memory = agent.memory
+        self.policy = Agent(agent.nb_actions, agent.input_dims, batch_size=memory.batch_size,
+                            N=memory.capacity, num_envs=memory.num_envs, shared=agent.shared)
+        self.policy.load_weights(agent)
+        self.thread = None
+        self.error = None
+        self.learning_steps = 0
+
+    @property
+    def learning(self):
+        return self.thread is not None and self.thread.is_alive()
+
+    def choose_action(self, observation):
+        return self.policy.choose_action(observation)
+
+    def choose_actions(self, observations):
+        return self.policy.choose_actions(observations)
+
+    def remember(self, state, action, probs, vals, reward, done):
+        self.policy.remember(state, action, probs, vals, reward, done)
+
+    def _learn(self):
+        try:
+            with self.profiler.span('learn'):
+                self.agent.learn()
+        except Exception as e:
+            self.error = e
+
+    def sync(self):
+        # Waits for the running learn step and publishes its weights
+        if self.thread is None:
+            return
+        self.thread.join()
+        self.thread = None
+        if self.error is not None:
+            error, self.error = self.error, None
+            raise error
+        self.learning_steps += 1
+        self.profiler.count('learn_steps')
+        self.policy.load_weights(self.agent)
+
+    def end_rollout(self):
+        # Only blocks when learning takes longer than collecting a rollout
+        with self.profiler.span('wait'):
+            self.sync()
+        self.agent.memory, self.policy.memory = self.policy.memory, self.agent.memory
+        self.thread = threading.Thread(target=self._learn, daemon=True)
+        self.thread.start()
+
+    def load_models(self, filename):
+        self.sync()
+        self.agent.load_models(filename)
+        self.policy.load_weights(self.agent)
+
+    def save_models(self, filename):
+        self.sync()
+        self.agent.save_models(filename)
+
+    def save_policy(self, filename):
+        # Saves the weights of the last finished learn step, held by the
+        # policy, without waiting for the running one
+        self.policy.models_dir = self.agent.models_dir
+        self.policy.save_models(filename)
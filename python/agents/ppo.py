@@ -5,48 +5,75 @@ import torch.nn as nn
 import torch.optim as optim
 from torch.distributions.categorical import Categorical
 
-class PPOMemory:
-    def __init__(self, batch_size):
-        self.states = []
-        self.probs = []
-        self.vals = []
-        self.actions = []
-        self.rewards = []
-        self.dones = []
-
+def compute_gae(rewards, values, dones, gamma, gae_lambda, last_values=None):
+    # Generalized advantage estimation in a single reverse pass over a [T] or
+    # [T, N] rollout (N envs stepped together). dones[t] ends the episode after
+    # step t: the next value is not bootstrapped and the advantage does not
+    # leak across the boundary. Without last_values the final step has nothing
+    # to bootstrap from and keeps a zero advantage.
+    rewards = np.asarray(rewards, dtype=np.float32)
+    values = np.asarray(values, dtype=np.float32)
+    not_dones = 1.0 - np.asarray(dones, dtype=np.float32)
+
+    advantages = np.zeros_like(rewards)
+    last_advantage = np.zeros(rewards.shape[1:], dtype=np.float32)
+    if last_values is None:
+        nb_steps = len(rewards) - 1
+        next_values = values[-1] if len(values) else last_advantage
+    else:
+        nb_steps = len(rewards)
+        next_values = np.asarray(last_values, dtype=np.float32)
+    for t in reversed(range(nb_steps)):
+        delta = rewards[t] + gamma * next_values * not_dones[t] - values[t]
+        last_advantage = delta + gamma * gae_lambda * not_dones[t] * last_advantage
+        advantages[t] = last_advantage
+        next_values = values[t]
+    return advantages, advantages + values
+
+class RolloutBuffer:
+    # Fixed-capacity rollout storage, one row per time step of num_envs envs,
+    # filled in place. The learner reads the filled rows through zero-copy
+    # torch.from_numpy views.
+    def __init__(self, capacity, obs_dim, batch_size, num_envs=1):
+        self.capacity = capacity
+        self.num_envs = num_envs
         self.batch_size = batch_size
 
-    def generate_batches(self):
-        nb_states = len(self.states)
-        batch_start = np.arange(0, nb_states, self.batch_size)
-        indices = np.arange(nb_states, dtype=np.int64)
-        np.random.shuffle(indices)
-        batches = [indices[i:i+self.batch_size] for i in batch_start]
-
-        return np.array(self.states),\
-               np.array(self.actions),\
-               np.array(self.probs), \
-               np.array(self.vals), \
-               np.array(self.rewards), \
-               np.array(self.dones), \
-               batches
+        self.states = np.zeros((capacity, num_envs, obs_dim), dtype=np.float32)
+        self.actions = np.zeros((capacity, num_envs), dtype=np.int64)
+        self.probs = np.zeros((capacity, num_envs), dtype=np.float32)
+        self.vals = np.zeros((capacity, num_envs), dtype=np.float32)
+        self.rewards = np.zeros((capacity, num_envs), dtype=np.float32)
+        self.dones = np.zeros((capacity, num_envs), dtype=bool)
+        self.size = 0
 
+    def __len__(self):
+        return self.size
 
     def store_memory(self, state, action, probs, vals, reward, done):
-        self.states.append(state)
-        self.actions.append(action)
-        self.probs.append(probs)
-        self.vals.append(vals)
-        self.rewards.append(reward)
-        self.dones.append(done)
+        if self.size == self.capacity:
+            raise ValueError(f"Rollout buffer is full ({self.capacity} steps), learn() must run first")
+        t = self.size
+        self.states[t] = state
+        self.actions[t] = action
+        self.probs[t] = probs
+        self.vals[t] = vals
+        self.rewards[t] = reward
+        self.dones[t] = done
+        self.size += 1
+
+    def rollout(self):
+        # [T, N] views of the filled rows
+        t = self.size
+        return self.states[:t], self.actions[:t], self.probs[:t], self.vals[:t], self.rewards[:t], self.dones[:t]
+
+    def shuffled_batches(self):
+        # Minibatches of flat (step * num_envs + env) sample indices
+        indices = np.random.permutation(self.size * self.num_envs)
+        return [indices[i:i+self.batch_size] for i in range(0, len(indices), self.batch_size)]
 
     def clear_memory(self):
-        self.states = []
-        self.probs = []
-        self.vals = []
-        self.actions = []
-        self.rewards = []
-        self.dones = []
+        self.size = 0
 
 
 class ActorNetwork(nn.Module):
@@ -63,8 +90,9 @@ class ActorNetwork(nn.Module):
             nn.ReLU(),
             nn.Linear(fc1_dims, fc2_dims),
             nn.ReLU(),
+            # Logits: Categorical normalizes them, so no Softmax layer is needed
+            # and checkpoints that had one (it has no weights) still load
             nn.Linear(fc2_dims, nb_actions),
-            nn.Softmax(dim=-1)
         )
 
         self.optimizer = optim.Adam(self.parameters(), lr=alpha)
@@ -73,8 +101,8 @@ class ActorNetwork(nn.Module):
 
 
     def forward(self, state):
-        dist = self.actor(state)
-        dist = Categorical(dist)
+        logits = self.actor(state)
+        dist = Categorical(logits=logits, validate_args=False)
         return dist
 
 
@@ -122,26 +150,104 @@ class CriticNetwork(nn.Module):
         self.load_state_dict(T.load(self.checkpoint_file))
 
 
+class ActorCriticNetwork(nn.Module):
+    # Actor and critic sharing one trunk, with a logits head and a value head,
+    # so a single forward pass gives both the policy and the state value.
+    def __init__(self, nb_actions, input_dims, alpha, fc1_dims=256, fc2_dims=256, chkpt_dir='models'):
+        super(ActorCriticNetwork, self).__init__()
+
+        self.checkpoint_file = os.path.join(chkpt_dir, 'actor_critic_torch_ppo.pth')
+        self.body = nn.Sequential(
+            nn.Linear(*input_dims, fc1_dims),
+            nn.ReLU(),
+            nn.Linear(fc1_dims, fc2_dims),
+            nn.ReLU(),
+            nn.Linear(fc1_dims, fc2_dims),
+            nn.ReLU(),
+            nn.Linear(fc1_dims, fc2_dims),
+            nn.ReLU(),
+        )
+        self.policy = nn.Linear(fc2_dims, nb_actions)
+        self.value = nn.Linear(fc2_dims, 1)
+
+        self.optimizer = optim.Adam(self.parameters(), lr=alpha)
+        self.device = T.device ('cuda:0' if T.cuda.is_available() else 'cpu')
+        self.to(self.device)
+
+
+    def forward(self, state):
+        features = self.body(state)
+        dist = Categorical(logits=self.policy(features), validate_args=False)
+        return dist, self.value(features)
+
+
+    def save_checkpoint(self):
+        T.save(self.state_dict(), self.checkpoint_file)
+    
+
+    def load_checkpoint(self):
+        self.load_state_dict(T.load(self.checkpoint_file))
+
+
 class Agent:
-    def __init__(self, nb_actions, input_dims, gamma=0.99, alpha=0.0003, gae_lambda=0.55, policy_clip=0.1, batch_size=64, N=2048, nb_epochs=10):
+    def __init__(self, nb_actions, input_dims, gamma=0.99, alpha=0.0003, gae_lambda=0.55, policy_clip=0.1, batch_size=64, N=2048, nb_epochs=10, num_envs=1, shared=False):
         self.gamma = gamma
         self.policy_clip = policy_clip
         self.nb_epochs = nb_epochs
         self.gae_lambda = gae_lambda
+        self.nb_actions = nb_actions
+        self.input_dims = input_dims
+        self.alpha = alpha
 
-        self.actor = ActorNetwork(nb_actions, input_dims, alpha)
-        self.critic = CriticNetwork(input_dims, alpha)
-        self.memory = PPOMemory(batch_size)
+        self.build_networks(shared)
+        # N is the rollout length: steps stored between two calls to learn()
+        self.memory = RolloutBuffer(N, input_dims[0], batch_size, num_envs)
 
         self.actor_loss = 0
         self.critic_loss = 0
 
 
+    def build_networks(self, shared):
+        # Either one shared-trunk ActorCriticNetwork or the split actor/critic
+        # pair; the unused attributes are None
+        self.shared = shared
+        if shared:
+            self.network = ActorCriticNetwork(self.nb_actions, self.input_dims, self.alpha)
+            self.actor = self.critic = None
+            self.optimizers = [self.network.optimizer]
+            self.device = self.network.device
+        else:
+            self.network = None
+            self.actor = ActorNetwork(self.nb_actions, self.input_dims, self.alpha)
+            self.critic = CriticNetwork(self.input_dims, self.alpha)
+            self.optimizers = [self.actor.optimizer, self.critic.optimizer]
+            self.device = self.actor.device
+        self.input_buffer = None
+
+    def load_weights(self, other):
+        # Copies the networks of another Agent, switching architecture if needed
+        if other.shared != self.shared:
+            self.build_networks(other.shared)
+        if self.shared:
+            self.network.load_state_dict(other.network.state_dict())
+        else:
+            self.actor.load_state_dict(other.actor.state_dict())
+            self.critic.load_state_dict(other.critic.state_dict())
+
+    def evaluate(self, states):
+        # Policy distribution and [B, 1] state values
+        if self.shared:
+            return self.network(states)
+        return self.actor(states), self.critic(states)
+
     def remember(self, state, action, probs, vals, reward, done):
         self.memory.store_memory(state, action, probs, vals, reward, done)
 
     def save_models(self, filename):
         print(f"Saving models to {filename}...")
+        if self.shared:
+            T.save(self.network.state_dict(), os.path.join(self.models_dir, f"{filename}_ac.pth"))
+            return
         actor_path = os.path.join(self.models_dir, f"{filename}_actor.pth")
         critic_path = os.path.join(self.models_dir, f"{filename}_critic.pth")
         T.save(self.actor.state_dict(), actor_path)
@@ -149,6 +255,14 @@ class Agent:
 
     def load_models(self, filename):
         print(f"Loading models from {filename}...")
+        # The checkpoint format decides the architecture
+        shared_path = os.path.join(self.models_dir, f"{filename}_ac.pth")
+        shared = os.path.exists(shared_path)
+        if shared != self.shared:
+            self.build_networks(shared)
+        if shared:
+            self.network.load_state_dict(T.load(shared_path))
+            return
         actor_path = os.path.join(self.models_dir, f"{filename}_actor.pth")
         critic_path = os.path.join(self.models_dir, f"{filename}_critic.pth")
         self.actor.load_state_dict(T.load(actor_path))
@@ -156,6 +270,7 @@ class Agent:
 
     def get_available_models(self):
         model_files = [f.replace('_actor.pth', '') for f in os.listdir(self.models_dir) if f.endswith('_actor.pth')]
+        model_files += [f.replace('_ac.pth', '') for f in os.listdir(self.models_dir) if f.endswith('_ac.pth')]
         return model_files
 
     def load_actor_model(self, file_path):
@@ -180,44 +295,50 @@ class Agent:
 
 
     def choose_action(self, observation):
-        state = T.tensor(np.array([observation]), dtype=T.float).to(self.actor.device)
-        dist = self.actor(state)
-        value = self.critic(state)
-        action = dist.sample()
-
-        probs = T.squeeze(dist.log_prob(action)).item()
-        action = T.squeeze(action).item()
-        value = T.squeeze(value).item()
-
-        return action, probs, value
+        actions, probs, values = self.choose_actions(np.asarray(observation)[None])
+        return int(actions[0]), float(probs[0]), float(values[0])
+
+    def choose_actions(self, observations):
+        # One forward pass for an [N, obs_dim] batch, returning [N] arrays of
+        # actions, log-probs and values. Observations are copied into an input
+        # tensor that is only reallocated when a larger batch comes in.
+        observations = np.asarray(observations, dtype=np.float32)
+        if self.input_buffer is None or self.input_buffer.shape[0] < len(observations):
+            self.input_buffer = T.empty(observations.shape, dtype=T.float, device=self.device)
+        states = self.input_buffer[:len(observations)]
+        states.copy_(T.from_numpy(observations))
+
+        with T.inference_mode():
+            dist, values = self.evaluate(states)
+            actions = dist.sample()
+            probs = dist.log_prob(actions)
+
+        return actions.cpu().numpy(), probs.cpu().numpy(), values.squeeze(-1).cpu().numpy()
 
     def learn(self):
         actor_losses = []
         critic_losses = []
-        for _ in range(self.nb_epochs):
-            state_arr, action_arr, old_probs_arr, vals_arr, reward_arr, done_arr, batches = self.memory.generate_batches()
-            values = vals_arr
-            advantage = np.zeros(len(reward_arr), dtype=np.float32)
-
-            for t in range(len(reward_arr) - 1):
-                discount = 1
-                a_t = 0
-                for k in range(t, len(reward_arr) - 1):
-                    a_t += discount*(reward_arr[k] + self.gamma*values[k+1]*(1-int(done_arr[k])) - values[k])
-                    discount *= self.gamma*self.gae_lambda
-                advantage[t] = a_t
+        state_arr, action_arr, old_probs_arr, vals_arr, reward_arr, done_arr = self.memory.rollout()
 
-            advantage = T.tensor(advantage).to(self.actor.device)
+        # Advantages only depend on the rollout, not on the epoch
+        advantage, returns = compute_gae(reward_arr, vals_arr, done_arr, self.gamma, self.gae_lambda)
 
-            values = T.tensor(values).to(self.actor.device)
+        # One sample per (step, env); on the CPU these share the buffer memory
+        device = self.device
+        state_arr = T.from_numpy(state_arr.reshape(-1, state_arr.shape[-1])).to(device)
+        action_arr = T.from_numpy(action_arr.reshape(-1)).to(device)
+        old_probs_arr = T.from_numpy(old_probs_arr.reshape(-1)).to(device)
+        advantage = T.from_numpy(advantage.reshape(-1)).to(device)
+        returns = T.from_numpy(returns.reshape(-1)).to(device)
 
-            for batch in batches:
-                states = T.tensor(state_arr[batch], dtype=T.float).to(self.actor.device)
-                old_probs = T.tensor(old_probs_arr[batch]).to(self.actor.device)
-                actions = T.tensor(action_arr[batch]).to(self.actor.device)
+        for _ in range(self.nb_epochs):
+            for batch in self.memory.shuffled_batches():
+                batch = T.from_numpy(batch).to(device)
+                states = state_arr[batch]
+                old_probs = old_probs_arr[batch]
+                actions = action_arr[batch]
 
-                dist = self.actor(states)
-                critic_values = self.critic(states)
+                dist, critic_values = self.evaluate(states)
 
                 critic_values = T.squeeze(critic_values)
 
@@ -229,18 +350,16 @@ class Agent:
                 weighted_clipped_probs = T.clamp(prob_ratio, 1-self.policy_clip, 1+self.policy_clip)*advantage[batch]
                 actor_loss = -T.min(weighted_probs, weighted_clipped_probs).mean()
 
-                returns = advantage[batch] + values[batch]
-
-                critic_loss = (returns-critic_values)**2
+                critic_loss = (returns[batch]-critic_values)**2
                 critic_loss = critic_loss.mean()
 
                 # gradient ascent not descent so we do + insteadd of -
                 total_loss = actor_loss + 0.5*critic_loss
-                self.actor.optimizer.zero_grad()
-                self.critic.optimizer.zero_grad()
+                for optimizer in self.optimizers:
+                    optimizer.zero_grad()
                 total_loss.backward()
-                self.actor.optimizer.step()
-                self.critic.optimizer.step()
+                for optimizer in self.optimizers:
+                    optimizer.step()
 
                 # Track losses
                 actor_losses.append(actor_loss.item())
@@ -3,6 +3,10 @@ import time
 import os
 from player_env import PlayerEnv
 from agents.ppo import Agent
+from agents.async_learner import AsyncLearner
+from profiler import Profiler
+from frame_scheduler import FrameScheduler
+from text_cache import render_text, TextSlots
 
 class AIMode:
     def __init__(self, screen, font, game):
@@ -12,6 +16,19 @@ class AIMode:
         self.env = PlayerEnv()
         self.agent = Agent(nb_actions=4, batch_size=1024, alpha=0.0003, nb_epochs=4, input_dims=(10,))
         self.agent.models_dir = "models_data"
+        # Per-phase timings, toggled with P; F9 starts/stops a cProfile capture
+        self.profiler = Profiler()
+        self.profile_lines = []
+        self.profile_refresh = 0
+        # Stat values and profiler lines change often; their labels do not
+        self.stat_values = TextSlots((255, 255, 255), font)
+        # Learning runs in the background while the next rollout is collected
+        self.learner = AsyncLearner(self.agent, self.profiler)
+        # Turbo (T) runs as many steps as fit between two frames drawn at
+        # turbo_fps, or at most turbo_steps steps per frame when it is set
+        self.turbo = False
+        self.turbo_fps = 30
+        self.turbo_steps = 0
         
         # Define layout constants
         self.left_panel_width = 200
@@ -36,12 +53,12 @@ class AIMode:
 
         back_button = pygame.Rect(10, self.screen.get_height() - 60, 180, 40)
 
+        scheduler = FrameScheduler()
         while True:
             self.screen.fill((0, 0, 0))
             self.draw_text('Select Level', (self.screen.get_width() // 2, 50))
-            self.draw_text('Warning: PyTorch will load causing a lagspike, don\'t panic', (self.screen.get_width() // 2, 80), color=(255, 255, 0))
 
-            for event in pygame.event.get():
+            for event in scheduler.wait_events():
                 if event.type == pygame.QUIT:
                     return None
                 if event.type == pygame.MOUSEBUTTONDOWN:
@@ -73,7 +90,7 @@ class AIMode:
             pygame.draw.rect(self.screen, (100, 100, 100), back_button)
             self.draw_text("Back", back_button.center)
 
-            pygame.display.flip()
+            scheduler.flip()
 
     def train_ai(self, level):
         self.env.set_level(level)
@@ -93,8 +110,9 @@ class AIMode:
 
         paused = False
         render_game = True
+        game_surface = pygame.Surface((self.game_area_width, self.game_area_height))
         start_time = time.time()
-        episode_start_time = time.time()
+        self.episode_start_time = time.time()
 
         # Adjust button positions
         button_width = 180
@@ -102,114 +120,167 @@ class AIMode:
         button_margin = 10
         pause_button = pygame.Rect(button_margin, button_margin, button_width, button_height)
         render_button = pygame.Rect(button_margin, pause_button.bottom + button_margin, button_width, button_height)
+        turbo_button = pygame.Rect(button_margin, render_button.bottom + button_margin, button_width, button_height)
         load_button = pygame.Rect(button_margin, self.screen.get_height() - 3 * (button_height + button_margin), button_width, button_height)
         save_button = pygame.Rect(button_margin, self.screen.get_height() - 2 * (button_height + button_margin), button_width, button_height)
         back_button = pygame.Rect(button_margin, self.screen.get_height() - (button_height + button_margin), button_width, button_height)
 
+        # Only paces the paused state, training itself runs uncapped
+        scheduler = FrameScheduler(fps=0)
         while True:
-            for event in pygame.event.get():
+            for event in scheduler.wait_events() if paused else pygame.event.get():
                 if event.type == pygame.QUIT:
+                    self.learner.sync()
                     return None
                 if event.type == pygame.KEYDOWN:
                     if event.key == pygame.K_SPACE:
                         paused = not paused
                     elif event.key == pygame.K_r:
                         render_game = not render_game
+                    elif event.key == pygame.K_t:
+                        self.turbo = not self.turbo
+                    elif event.key == pygame.K_p:
+                        self.profiler.enabled = not self.profiler.enabled
+                        self.profiler.reset()
+                        self.profile_lines = []
+                    elif event.key == pygame.K_F9:
+                        if self.profiler.capturing:
+                            self.profiler.stop_capture()
+                        else:
+                            self.profiler.start_capture(duration=10)
                 if event.type == pygame.MOUSEBUTTONDOWN:
                     if event.button == 1:  # Left mouse button
                         if pause_button.collidepoint(event.pos):
                             paused = not paused
                         elif render_button.collidepoint(event.pos):
                             render_game = not render_game
+                        elif turbo_button.collidepoint(event.pos):
+                            self.turbo = not self.turbo
                         elif back_button.collidepoint(event.pos):
+                            self.learner.sync()
                             return None
                         elif save_button.collidepoint(event.pos):
                             self.save_model()
                         elif load_button.collidepoint(event.pos):
                             self.load_model()
 
-            if not paused:
-                action, prob, val = self.agent.choose_action(state)
-                next_state, reward, done = self.env.step(action)
+            self.profiler.poll_capture()
+            profiler = self.profiler
 
-                stats["current_reward"] += reward
-                stats["time_steps"] += 1
+            if not paused:
+                if self.turbo:
+                    frame_end = time.perf_counter() + 1 / self.turbo_fps
+                    steps = 0
+                    while time.perf_counter() < frame_end and (not self.turbo_steps or steps < self.turbo_steps):
+                        state = self.train_step(state, stats)
+                        steps += 1
+                else:
+                    state = self.train_step(state, stats)
                 stats["session_time"] = time.time() - start_time
-                stats["episode_time"] = time.time() - episode_start_time
+                stats["episode_time"] = time.time() - self.episode_start_time
                 stats["real_time_equivalent"] = stats["time_steps"] / 60
 
-                self.agent.remember(state, action, prob, val, reward, done)
-
-                if stats["time_steps"] % 1024 == 0:
-                    self.agent.learn()
-                    stats["learning_steps"] += 1
-                    stats["current_loss_actor"] = self.agent.actor_loss
-                    stats["current_loss_critic"] = self.agent.critic_loss
-
-                if done:
-                    stats["episode"] += 1
-                    stats["current_reward"] = 0
-                    episode_start_time = time.time()
-                    state, _, _ = self.env.reset()
-                else:
-                    state = next_state
-
             self.screen.fill((0, 0, 0))
 
             # Draw left panel
             pygame.draw.rect(self.screen, (50, 50, 50), (0, 0, self.left_panel_width, self.screen.get_height()))
 
             # Draw game area
-            game_surface = pygame.Surface((self.game_area_width, self.game_area_height))
             if render_game:
-                self.env.render(game_surface)
-            self.screen.blit(game_surface, (self.game_area_left, 0))
+                with profiler.span('render'):
+                    self.env.render(game_surface, dirty=True)
+                self.screen.blit(game_surface, (self.game_area_left, 0))
 
             # Draw right panel (for stats)
             pygame.draw.rect(self.screen, (50, 50, 50), (self.screen.get_width() - self.right_panel_width, 0, self.right_panel_width, self.screen.get_height()))
 
-            self.draw_stats(stats)
-            self.draw_control_panel(paused, render_game, pause_button, render_button, load_button, save_button, back_button)
-
-            pygame.display.flip()
+            with profiler.span('stats'):
+                self.draw_stats(stats)
+            self.draw_control_panel(paused, render_game, pause_button, render_button, turbo_button, load_button, save_button, back_button)
+
+            with profiler.span('flip'):
+                scheduler.flip()
+
+    def train_step(self, state, stats):
+        # One env step and its bookkeeping; returns the next state
+        profiler = self.profiler
+        with profiler.span('action'):
+            action, prob, val = self.learner.choose_action(state)
+        with profiler.span('step'):
+            next_state, reward, done = self.env.step(action)
+
+        stats["current_reward"] += reward
+        stats["time_steps"] += 1
+        profiler.count('env_steps')
+
+        self.learner.remember(state, action, prob, val, reward, done)
+
+        if stats["time_steps"] % 1024 == 0:
+            self.learner.end_rollout()
+            # Losses of the last learn step that finished
+            stats["learning_steps"] = self.learner.learning_steps
+            stats["current_loss_actor"] = self.agent.actor_loss
+            stats["current_loss_critic"] = self.agent.critic_loss
+
+        if done:
+            stats["episode"] += 1
+            profiler.count('episodes')
+            stats["current_reward"] = 0
+            self.episode_start_time = time.time()
+            state, _, _ = self.env.reset()
+            return state
+        return next_state
 
     def draw_stats(self, stats):
+        x = self.screen.get_width() - self.right_panel_width + 10
         y = 10
         for key, value in stats.items():
-            if isinstance(value, float):
-                text = f"{key}: {value:.2f}"
-            else:
-                text = f"{key}: {value}"
-            self.draw_text(text, (self.screen.get_width() - self.right_panel_width + 10, y), align="left")
+            label_rect = self.draw_text(f"{key}: ", (x, y), align="left")
+            value_surface = self.stat_values.render(key, f"{value:.2f}" if isinstance(value, float) else f"{value}")
+            self.screen.blit(value_surface, value_surface.get_rect(midleft=label_rect.midright))
             y += 30
 
-    def draw_control_panel(self, paused, render_game, pause_button, render_button, load_button, save_button, back_button):
+        if self.profiler.enabled:
+            # Percentiles are recomputed twice a second, not every frame
+            if time.time() - self.profile_refresh > 0.5:
+                self.profile_lines = self.profiler.summary_lines()
+                self.profile_refresh = time.time()
+            self.draw_text("p50/p95/max ms", (x, y), align="left")
+            y += 20
+            for i, line in enumerate(self.profile_lines):
+                surface = self.stat_values.render(('profile', i), line)
+                self.screen.blit(surface, surface.get_rect(midleft=(x, y)))
+                y += 20
+
+    def draw_control_panel(self, paused, render_game, pause_button, render_button, turbo_button, load_button, save_button, back_button):
         # Draw buttons
         pygame.draw.rect(self.screen, (255, 0, 0) if paused else (0, 255, 0), pause_button)
         pygame.draw.rect(self.screen, (255, 0, 0) if not render_game else (0, 255, 0), render_button)
+        pygame.draw.rect(self.screen, (0, 255, 0) if self.turbo else (100, 100, 100), turbo_button)
         pygame.draw.rect(self.screen, (100, 100, 100), load_button)
         pygame.draw.rect(self.screen, (100, 100, 100), save_button)
         pygame.draw.rect(self.screen, (100, 100, 100), back_button)
 
         self.draw_text("Pause/Resume", pause_button.center, color=(0, 0, 0))
         self.draw_text("Toggle Render", render_button.center, color=(0, 0, 0))
+        self.draw_text("Turbo", turbo_button.center, color=(0, 0, 0) if self.turbo else (255, 255, 255))
         self.draw_text("Load Model", load_button.center)
         self.draw_text("Save Model", save_button.center)
         self.draw_text("Back to Menu", back_button.center)
 
     def draw_text(self, text, position, color=(255, 255, 255), align="center"):
-        text_surface = self.font.render(text, True, color)
+        text_surface = render_text(text, color, self.font)
         text_rect = text_surface.get_rect()
         if align == "center":
             text_rect.center = position
         elif align == "left":
             text_rect.midleft = position
-        self.screen.blit(text_surface, text_rect)
+        return self.screen.blit(text_surface, text_rect)
 
     def save_model(self):
         filename = self.text_input("Enter model name to save:")
         if filename:
-            self.agent.save_models(filename)
+            self.learner.save_models(filename)
             print(f"Model saved as {filename}")
 
     def load_model(self):
@@ -220,14 +291,15 @@ class AIMode:
 
         selected_model = self.selection_menu("Select a model to load:", available_models)
         if selected_model:
-            self.agent.load_models(selected_model)
+            self.learner.load_models(selected_model)
             print(f"Model {selected_model} loaded")
 
     def text_input(self, prompt):
         input_text = ""
         input_active = True
+        scheduler = FrameScheduler()
         while input_active:
-            for event in pygame.event.get():
+            for event in scheduler.wait_events():
                 if event.type == pygame.QUIT:
                     return None
                 if event.type == pygame.KEYDOWN:
@@ -242,7 +314,7 @@ class AIMode:
             self.draw_text(prompt, (self.screen.get_width() // 2, self.screen.get_height() // 2 - 50))
             pygame.draw.rect(self.screen, (100, 100, 100), (self.screen.get_width() // 2 - 100, self.screen.get_height() // 2, 200, 40))
             self.draw_text(input_text, (self.screen.get_width() // 2, self.screen.get_height() // 2 + 20))
-            pygame.display.flip()
+            scheduler.flip()
 
         return input_text
 
@@ -256,8 +328,9 @@ class AIMode:
 
         back_button = pygame.Rect(10, self.screen.get_height() - 60, 180, 40)
 
+        scheduler = FrameScheduler()
         while True:
-            for event in pygame.event.get():
+            for event in scheduler.wait_events():
                 if event.type == pygame.QUIT:
                     return None
                 if event.type == pygame.MOUSEBUTTONDOWN:
@@ -295,4 +368,4 @@ class AIMode:
             pygame.draw.rect(self.screen, (100, 100, 100), back_button)
             self.draw_text("Back", back_button.center)
 
-            pygame.display.flip()
\ No newline at end of file
+            scheduler.flip()
\ No newline at end of file
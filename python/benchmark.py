@@ -0,0 +1,249 @@
+import argparse
+import json
+import os
+import platform
+import subprocess
+import time
+import numpy as np
+from game import Game
+from level_compiler import compile_level
+from player_env import PlayerEnv
+from vector_game import VectorPlayerEnv
+
+BENCHMARKS_FOLDER = "benchmarks"
+
+
+def timed(fn, number, repeat=5):
+    # Per-call timings in microseconds over repeat runs of number calls
+    runs = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        runs.append((time.perf_counter() - start) / number * 1e6)
+    runs = np.array(runs)
+    return {'median_us': float(np.median(runs)), 'min_us': float(runs.min()), 'max_us': float(runs.max()),
+            'calls': number * repeat}
+
+
+def synthetic_level(nb_walls, width, height, seed=0):
+    # Random walls kept away from the spawn at the screen center, plus one
+    # reward zone and one fixed reward
+    rng = np.random.default_rng(seed)
+    spawn = (width // 2, height // 2)
+    walls = []
+    while len(walls) < nb_walls:
+        w, h = rng.integers(5, 40, size=2)
+        x, y = rng.integers(0, width - w), rng.integers(0, height - h)
+        if x < spawn[0] + 60 and spawn[0] - 60 < x + w and y < spawn[1] + 60 and spawn[1] - 60 < y + h:
+            continue
+        walls.append([int(x), int(y), int(w), int(h)])
+    data = {'walls': walls, 'spawn': list(spawn), 'rewards': [[width // 2 + 40, height // 2]],
+            'reward_zones': [{'center': list(spawn), 'radius': 200}]}
+    return compile_level(f"synthetic-{nb_walls}", data, width, height)
+
+
+def visited_positions(game, count, seed=0):
+    # Player positions met by a random policy, so ray casts see realistic surroundings
+    rng = np.random.default_rng(seed)
+    game.reset()
+    positions = []
+    for action in rng.integers(0, 4, size=count):
+        _, _, done = game.step(int(action))
+        positions.append(game.player.rect.topleft)
+        if done:
+            game.reset()
+    return positions
+
+
+def bench_game(level_names, synthetic_sizes, number):
+    game = Game(seed=0)
+    for size in synthetic_sizes:
+        level = synthetic_level(size, game.width, game.height)
+        game.levels[level.name] = level
+
+    results = {}
+    for level_name in list(level_names) + [f"synthetic-{size}" for size in synthetic_sizes]:
+        game.set_level(level_name)
+        positions = visited_positions(game, 256)
+        cursor = [0]
+
+        def cast_rays():
+            game.player.rect.topleft = positions[cursor[0] % len(positions)]
+            cursor[0] += 1
+            game._cast_rays()
+
+        actions = np.random.default_rng(1).integers(0, 4, size=number).tolist()
+
+        def step():
+            _, _, done = game.step(actions[cursor[0] % number])
+            cursor[0] += 1
+            if done:
+                game.reset()
+
+        results[f"game._cast_rays/{level_name}"] = timed(cast_rays, number)
+        # Same rays with and without the spatial index, to tune raycast.INDEX_MIN_EDGES
+        index = game.raycaster.index
+        game.raycaster.index = game.spatial_index
+        results[f"game._cast_rays_indexed/{level_name}"] = timed(cast_rays, number)
+        game.raycaster.index = None
+        results[f"game._cast_rays_plain/{level_name}"] = timed(cast_rays, number)
+        game.raycaster.index = index
+        game.reset()
+        results[f"game.step/{level_name}"] = timed(step, number)
+        results[f"game.reset/{level_name}"] = timed(game.reset, number)
+        results[f"game._generate_rewards/{level_name}"] = timed(game._generate_rewards, number)
+    return results
+
+
+def bench_agent(rollout_sizes, number):
+    from agents.ppo import Agent
+
+    results = {}
+    rng = np.random.default_rng(0)
+    for shared in (False, True):
+        kind = 'shared' if shared else 'split'
+        agent = Agent(nb_actions=4, input_dims=(10,), shared=shared)
+        observation = rng.random(10)
+        batch = rng.random((64, 10))
+        results[f"agent.choose_action/{kind}"] = timed(lambda: agent.choose_action(observation), number)
+        results[f"agent.choose_actions/{kind}-64"] = timed(lambda: agent.choose_actions(batch), max(number // 10, 1))
+
+        for size in rollout_sizes:
+            agent = Agent(nb_actions=4, input_dims=(10,), batch_size=1024, nb_epochs=4, N=size, shared=shared)
+
+            def learn():
+                for _ in range(size):
+                    agent.remember(rng.random(10), int(rng.integers(4)), -1.4, float(rng.normal()),
+                                   float(rng.normal()), bool(rng.random() < 0.01))
+                start = time.perf_counter()
+                agent.learn()
+                return time.perf_counter() - start
+
+            runs = np.array([learn() for _ in range(3)]) * 1e6
+            results[f"agent.learn/{kind}-rollout-{size}"] = {
+                'median_us': float(np.median(runs)), 'min_us': float(runs.min()), 'max_us': float(runs.max()), 'calls': 3}
+    return results
+
+
+def ppo_loop(level_name, num_envs, steps, rollout):
+    # The train.py loop: batched env, batched inference, background learning
+    from agents.ppo import Agent
+    from agents.async_learner import AsyncLearner
+
+    if num_envs == 1:
+        env = PlayerEnv(seed=0)
+        env.set_level(level_name)
+        state, _, _ = env.reset()
+    else:
+        env = VectorPlayerEnv(num_envs, seed=0)
+        state = env.set_level(level_name)
+    agent = Agent(nb_actions=4, input_dims=(10,), batch_size=1024, nb_epochs=4, N=rollout, num_envs=num_envs)
+    learner = AsyncLearner(agent)
+
+    start = time.perf_counter()
+    time_steps = 0
+    while time_steps < steps:
+        if num_envs == 1:
+            action, prob, val = learner.choose_action(state)
+            next_state, reward, done = env.step(action)
+            learner.remember(state, action, prob, val, reward, done)
+            state = env.reset()[0] if done else next_state
+        else:
+            actions, probs, vals = learner.choose_actions(state)
+            next_state, rewards, dones = env.step(actions)
+            learner.remember(state, actions, probs, vals, rewards, dones)
+            state = next_state
+        time_steps += num_envs
+        if len(learner.policy.memory) == rollout:
+            learner.end_rollout()
+    learner.sync()
+    elapsed = time.perf_counter() - start
+    return {'steps': time_steps, 'seconds': elapsed, 'steps_per_s': time_steps / elapsed}
+
+
+def bench_ppo(level_name, env_counts, steps):
+    return {f"ppo_loop/{level_name}-envs-{num_envs}": ppo_loop(level_name, num_envs, steps, max(1024 // num_envs, 16))
+            for num_envs in env_counts}
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def metadata():
+    import torch
+    return {
+        'commit': git_commit(),
+        'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'torch': torch.__version__,
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+    }
+
+
+def compare(results, baseline_file):
+    # Prints current / baseline for every benchmark present in both runs
+    with open(baseline_file) as f:
+        baseline = json.load(f)['results']
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        key = 'steps_per_s' if 'steps_per_s' in result else 'median_us'
+        ratio = result[key] / baseline[name][key]
+        print(f"{name:60s} {key} {result[key]:12.2f} vs {baseline[name][key]:12.2f} ({ratio:.2f}x)")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the simulation and training code")
+    parser.add_argument('--quick', action='store_true', help="fewer calls and smaller sizes")
+    parser.add_argument('--only', nargs='+', choices=['game', 'agent', 'ppo'], default=['game', 'agent', 'ppo'])
+    parser.add_argument('--output', help=f"result file, defaults to {BENCHMARKS_FOLDER}/<commit>-<time>.json")
+    parser.add_argument('--compare', help="earlier result file to compare against")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    game_calls = 200 if args.quick else 2000
+    synthetic_sizes = [10, 100] if args.quick else [10, 100, 1000]
+    rollout_sizes = [256, 1024] if args.quick else [256, 1024, 4096]
+    ppo_steps = 4096 if args.quick else 32768
+
+    level_names = sorted(os.path.splitext(f)[0] for f in os.listdir("levelsdata") if f.endswith('.json'))
+    results = {}
+    if 'game' in args.only:
+        results.update(bench_game(level_names, synthetic_sizes, game_calls))
+    if 'agent' in args.only:
+        results.update(bench_agent(rollout_sizes, game_calls))
+    if 'ppo' in args.only:
+        results.update(bench_ppo('corridor-h1', [1, 16], ppo_steps))
+
+    for name, result in results.items():
+        if 'steps_per_s' in result:
+            print(f"{name:60s} {result['steps_per_s']:12.0f} steps/s")
+        else:
+            print(f"{name:60s} {result['median_us']:12.1f} us")
+
+    meta = metadata()
+    output = args.output
+    if output is None:
+        stamp = meta['time'].replace(':', '').replace('-', '')
+        output = os.path.join(BENCHMARKS_FOLDER, f"{meta['commit'] or 'nogit'}-{stamp}.json")
+    os.makedirs(os.path.dirname(output) or '.', exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump({'meta': meta, 'results': results}, f, indent=2)
+    print(f"Results written to {output}")
+
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == '__main__':
+    main()
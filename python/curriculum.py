@@ -0,0 +1,121 @@
+import os
+import json
+import numpy as np
+from typing import List, Dict
+from game import SCREEN_WIDTH, SCREEN_HEIGHT, WITH_BORDERS
+from level_compiler import load_compiled_level
+
+CURRICULA_FOLDER = "curriculadata"
+
+class CurriculumStep:
+    def __init__(self, episodes: int, levels: Dict[str, float]):
+        self.episodes = episodes
+        self.levels = levels
+
+class Curriculum:
+    def __init__(self):
+        self.steps: List[CurriculumStep] = []
+
+    def add_step(self, step: CurriculumStep):
+        self.steps.append(step)
+
+    def remove_step(self, index: int):
+        if 0 <= index < len(self.steps):
+            del self.steps[index]
+
+    def save_to_json(self, filename: str):
+        data = [{"episodes": step.episodes, "levels": step.levels} for step in self.steps]
+        with open(filename, 'w') as f:
+            json.dump(data, f)
+
+    @classmethod
+    def load_from_json(cls, filename: str):
+        curriculum = cls()
+        with open(filename, 'r') as f:
+            data = json.load(f)
+        for step_data in data:
+            curriculum.add_step(CurriculumStep(step_data["episodes"], step_data["levels"]))
+        return curriculum
+
+
+class CurriculumScheduler:
+    # Runs a Curriculum: levels are drawn per episode from the weights of the
+    # current step, and the scheduler moves to the next step once that many
+    # episodes have finished, counted over every environment. The last step
+    # keeps running once reached.
+    def __init__(self, curriculum: Curriculum, levels_folder: str = "levelsdata", seed=None):
+        if not curriculum.steps:
+            raise ValueError("Curriculum has no steps")
+        self.curriculum = curriculum
+        self.rng = np.random.default_rng(seed)
+
+        # Every referenced level is compiled (or read from the cache) once here;
+        # envs loading the same files then get the same in-memory levels
+        self.levels = {}
+        for step in curriculum.steps:
+            for level_name in step.levels:
+                if level_name not in self.levels:
+                    filepath = os.path.join(levels_folder, f"{level_name}.json")
+                    try:
+                        self.levels[level_name] = load_compiled_level(filepath, SCREEN_WIDTH, SCREEN_HEIGHT, WITH_BORDERS)
+                    except FileNotFoundError:
+                        raise ValueError(f"Level '{level_name}' not found")
+
+        self.step_weights = []
+        for i, step in enumerate(curriculum.steps):
+            names = list(step.levels)
+            weights = np.array([step.levels[name] for name in names], dtype=np.float64)
+            if not len(weights) or weights.min() < 0 or weights.sum() <= 0:
+                raise ValueError(f"Curriculum step {i + 1} has no level with a positive weight")
+            self.step_weights.append((names, weights / weights.sum()))
+
+        self.step_index = 0
+        self.step_episodes = 0
+        self.total_episodes = 0
+
+    @classmethod
+    def load(cls, filename: str, levels_folder: str = "levelsdata", seed=None):
+        # filename is a path or the name of a curriculum saved in curriculadata/
+        if not os.path.exists(filename):
+            filename = os.path.join(CURRICULA_FOLDER, f"{filename}.json")
+        return cls(Curriculum.load_from_json(filename), levels_folder, seed)
+
+    @property
+    def current_step(self) -> CurriculumStep:
+        return self.curriculum.steps[self.step_index]
+
+    @property
+    def finished(self) -> bool:
+        return (self.step_index == len(self.curriculum.steps) - 1 and
+                self.step_episodes >= self.current_step.episodes)
+
+    def record_episodes(self, count: int = 1):
+        # Returns True when the curriculum moved to another step
+        self.total_episodes += count
+        self.step_episodes += count
+        changed = False
+        while self.step_index < len(self.curriculum.steps) - 1 and self.step_episodes >= self.current_step.episodes:
+            self.step_episodes -= self.current_step.episodes
+            self.step_index += 1
+            changed = True
+        return changed
+
+    def sample_levels(self, count: int) -> List[str]:
+        names, weights = self.step_weights[self.step_index]
+        return [names[i] for i in self.rng.choice(len(names), size=count, p=weights)]
+
+    def sample_level(self) -> str:
+        return self.sample_levels(1)[0]
+
+    def assign(self, env, env_ids=None):
+        # Draws the next level of every selected env of a batched env
+        # (VectorPlayerEnv or SubprocVectorEnv) and switches them, one
+        # set_level call per distinct level. Returns the observations of all envs.
+        env_ids = np.arange(env.num_envs) if env_ids is None else np.atleast_1d(env_ids)
+        groups: Dict[str, List[int]] = {}
+        for i, level_name in zip(env_ids.tolist(), self.sample_levels(len(env_ids))):
+            groups.setdefault(level_name, []).append(i)
+        state = None
+        for level_name, ids in groups.items():
+            state = env.set_level(level_name, ids)
+        return state
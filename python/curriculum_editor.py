@@ -1,45 +1,17 @@
 import pygame
 import json
-from typing import List, Dict
 import os
-
-class CurriculumStep:
-    def __init__(self, episodes: int, levels: Dict[str, float]):
-        self.episodes = episodes
-        self.levels = levels
-
-class Curriculum:
-    def __init__(self):
-        self.steps: List[CurriculumStep] = []
-
-    def add_step(self, step: CurriculumStep):
-        self.steps.append(step)
-
-    def remove_step(self, index: int):
-        if 0 <= index < len(self.steps):
-            del self.steps[index]
-
-    def save_to_json(self, filename: str):
-        data = [{"episodes": step.episodes, "levels": step.levels} for step in self.steps]
-        with open(filename, 'w') as f:
-            json.dump(data, f)
-
-    @classmethod
-    def load_from_json(cls, filename: str):
-        curriculum = cls()
-        with open(filename, 'r') as f:
-            data = json.load(f)
-        for step_data in data:
-            curriculum.add_step(CurriculumStep(step_data["episodes"], step_data["levels"]))
-        return curriculum
+from curriculum import Curriculum, CurriculumStep
+from frame_scheduler import FrameScheduler
+from text_cache import get_font, render_text
 
 class CurriculumEditor:
     def __init__(self, screen_width: int, screen_height: int):
         self.screen_width = screen_width
         self.screen_height = screen_height
         self.curriculum = Curriculum()
-        self.font = pygame.font.Font(None, 24)
-        self.input_font = pygame.font.Font(None, 32)
+        self.font = get_font(24)
+        self.input_font = get_font(32)
         self.colors = {
             'background': (0, 0, 0),
             'text': (255, 255, 255),
@@ -58,14 +30,15 @@ class CurriculumEditor:
 
     def run(self, screen):
         running = True
+        scheduler = FrameScheduler()
         while running:
-            for event in pygame.event.get():
+            for event in scheduler.wait_events():
                 if event.type == pygame.QUIT:
                     running = False
                 self.handle_event(event)
 
             self.draw(screen)
-            pygame.display.flip()
+            scheduler.flip()
 
     def handle_event(self, event):
         if event.type == pygame.MOUSEBUTTONDOWN:
@@ -179,8 +152,9 @@ class CurriculumEditor:
         input_active = True
         input_rect = pygame.Rect(self.screen_width // 2 - 100, self.screen_height // 2 - 16, 200, 32)
 
+        scheduler = FrameScheduler()
         while input_active:
-            for event in pygame.event.get():
+            for event in scheduler.wait_events():
                 if event.type == pygame.QUIT:
                     return None
                 if event.type == pygame.KEYDOWN:
@@ -203,7 +177,7 @@ class CurriculumEditor:
 
             # Draw input box
             pygame.draw.rect(screen, self.colors['button'], input_rect)
-            text_surface = self.input_font.render(input_text, True, self.colors['text'])
+            text_surface = render_text(input_text, self.colors['text'], self.input_font)
             screen.blit(text_surface, (input_rect.x + 5, input_rect.y + 5))
 
             # Draw error message if input is invalid
@@ -212,10 +186,10 @@ class CurriculumEditor:
             except ValueError:
                 if input_text:
                     error_text = "Invalid number. Please enter a valid number."
-                    error_surface = self.font.render(error_text, True, (255, 0, 0))
+                    error_surface = render_text(error_text, (255, 0, 0), self.font)
                     screen.blit(error_surface, (self.screen_width // 2 - 100, self.screen_height // 2 + 20))
 
-            pygame.display.flip()
+            scheduler.flip()
 
         return None
 
@@ -280,8 +254,7 @@ class CurriculumEditor:
     def draw_text(self, screen, text, position, color=None, font_size=24):
         if color is None:
             color = self.colors['text']
-        font = pygame.font.Font(None, font_size)
-        text_surface = font.render(text, True, color)
+        text_surface = render_text(text, color, get_font(font_size))
         text_rect = text_surface.get_rect(center=position)
         screen.blit(text_surface, text_rect)
 
@@ -316,8 +289,9 @@ class CurriculumEditor:
         input_text = ""
         input_active = True
 
+        scheduler = FrameScheduler()
         while input_active:
-            for event in pygame.event.get():
+            for event in scheduler.wait_events():
                 if event.type == pygame.QUIT:
                     return None
                 if event.type == pygame.KEYDOWN:
@@ -336,11 +310,11 @@ class CurriculumEditor:
 
             # Draw input box
             pygame.draw.rect(screen, self.colors['button'], (self.screen_width // 2 - 100, self.screen_height // 2, 200, 40))
-            text_surface = self.font.render(input_text, True, self.colors['text'])
+            text_surface = render_text(input_text, self.colors['text'], self.font)
             screen.blit(text_surface, (self.screen_width // 2 - 95, self.screen_height // 2 + 5))
 
-            pygame.display.flip()
+            scheduler.flip()
 
-def curriculum_editor_mode(screen, font, game, clock):
+def curriculum_editor_mode(screen, font, game):
     editor = CurriculumEditor(screen.get_width(), screen.get_height())
     editor.run(screen)
\ No newline at end of file
@@ -0,0 +1,51 @@
+import time
+import pygame
+
+
+class FrameScheduler:
+    # Paces an interactive loop. ticks() returns how many fixed simulation
+    # ticks are due since the last call, so the simulation runs at tick_rate
+    # whatever the frame rate, catching up at most max_catch_up ticks per
+    # frame after a stall. flip() presents a frame and sleeps to hold it to
+    # fps (0 leaves the frame rate uncapped).
+    # Loops that only change on input use wait_events(): once a frame has
+    # been presented it blocks until an event arrives or idle_timeout ms
+    # pass, instead of redrawing the same frame at full speed.
+    def __init__(self, tick_rate=60, fps=60, max_catch_up=5, idle_timeout=500):
+        self.tick_time = 1 / tick_rate
+        self.fps = fps
+        self.max_catch_up = max_catch_up
+        self.idle_timeout = idle_timeout
+        self.clock = pygame.time.Clock()
+        self.presented = False
+        self.restart()
+
+    def restart(self):
+        # Forget time spent outside the loop, e.g. in a menu
+        self.last_time = time.perf_counter()
+        self.accumulator = 0.0
+
+    def ticks(self):
+        now = time.perf_counter()
+        self.accumulator += now - self.last_time
+        self.last_time = now
+        due = int(self.accumulator / self.tick_time)
+        if due > self.max_catch_up:
+            # Too far behind: drop the backlog rather than fast-forward
+            self.accumulator = 0.0
+            return self.max_catch_up
+        self.accumulator -= due * self.tick_time
+        return due
+
+    def wait_events(self):
+        if not self.presented:
+            return pygame.event.get()
+        event = pygame.event.wait(self.idle_timeout)
+        if event.type == pygame.NOEVENT:
+            return []
+        return [event] + pygame.event.get()
+
+    def flip(self):
+        pygame.display.flip()
+        self.presented = True
+        self.clock.tick(self.fps)
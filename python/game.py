@@ -1,8 +1,10 @@
-import pygame
 import numpy as np
-import random
-import os
 import json
+from collections import namedtuple
+from raycast import RayCaster
+from spatial_index import UniformGrid
+from geometry import Rect
+from level_compiler import compile_level, load_compiled_level, load_compiled_levels
 
 SCREEN_WIDTH = 800
 SCREEN_HEIGHT = 600
@@ -10,8 +12,21 @@ MIN_WALLS = 1
 MAX_WALLS = 3
 WITH_BORDERS = True
 
+# Mutable state of a Game. The level is referred to by its template key, so
+# snapshots stay small to copy and pickle; goals holds the indices of the
+# remaining goals in zone goals + template goals order.
+GameSnapshot = namedtuple('GameSnapshot', ['template_key', 'player', 'zone_goals', 'goals', 'nbsteps',
+                                           'rng_state', 'ray_distances', 'ray_endpoints'])
+
+
+def default_level(width, height):
+    # Empty level used until set_level is called
+    data = {'walls': [], 'spawn': [width // 2, height // 2], 'rewards': [[700, 500]]}
+    return compile_level('default', data, width, height, WITH_BORDERS)
+
+
 class Game:
-    def __init__(self):
+    def __init__(self, seed=None):
         self.width, self.height = SCREEN_WIDTH, SCREEN_HEIGHT
         self.colors = {
             'black': (0, 0, 0),
@@ -23,9 +38,11 @@ class Game:
             'white': (255, 255, 255),
             'gray': (200, 200, 200),
         }
-        self.player = None
-        self.walls = []
+        self.player = Player(0, 0)
+        self.walls = ()
         self.goals = []
+        self.zone_goals = []
+        self.template = None
         self.raycast_dist = 75
         self.reward_zones = []
         self.colors['reward_zone'] = (0, 255, 0, 128)  # Semi-transparent green
@@ -33,25 +50,58 @@ class Game:
         self.ray_angles = np.linspace(0, 2 * np.pi, self.num_rays, endpoint=False)
         self.ray_distances = np.zeros(self.num_rays)
         self.ray_endpoints = [None] * self.num_rays
+        self.raycaster = RayCaster(self.ray_angles, self.raycast_dist)
+        self.grid_cell_size = 50
+        self.occupancy_resolution = 4
+        # Sphere-tracing steps per ray before the exact test. On the shipped
+        # levels the origin distance check alone wins, see benchmark.py
+        self.ray_trace_steps = 0
+        self.renderer = None
+        self.spatial_index = None
+        self.occupancy = None
         self.nbsteps = 0
+        self.rng = np.random.default_rng(seed)
 
         self.levels_folder = "levelsdata"
         self.levels = self.load_all_levels()
         self.current_level = None
+        self._use_template(self._default_level())
 
     def set_level(self, level_name):
         if level_name in self.levels:
             self.current_level = self.levels[level_name]
-            self.reset()
+            self._use_template(self.current_level)
+            return self.reset()
         else:
             raise ValueError(f"Level '{level_name}' not found")
 
     def load_level_from_json(self, filename):
         try:
-            with open(filename, 'r') as f:
-                self.current_level = json.load(f)
+            self.current_level = load_compiled_level(filename, self.width, self.height, WITH_BORDERS)
         except FileNotFoundError:
             raise ValueError(f"Level file '{filename}' not found")
+        self._use_template(self.current_level)
+
+    def _default_level(self):
+        return default_level(self.width, self.height)
+
+    def _use_template(self, level):
+        # Everything that does not change during an episode is bound here once
+        # per level switch; reset() only rewrites the mutable state.
+        self.template = LevelTemplate.for_level(level, self.width, self.height, self.grid_cell_size,
+                                                self.occupancy_resolution, self.raycast_dist)
+        self._bind_template()
+
+    def _bind_template(self):
+        self.walls = self.template.walls
+        self.reward_zones = self.template.reward_zones
+        self.zone_goals = [Goal(0, 0, 7) for _ in self.reward_zones]
+        self.spatial_index = self.template.spatial_index
+        self.occupancy = self.template.occupancy
+        self.raycaster.set_edges(self.template.edge_starts, self.template.edge_vectors, self.template.edge_offsets, index=self.spatial_index)
+
+    def seed(self, seed=None):
+        self.rng = np.random.default_rng(seed)
 
     def save_level_to_json(self, filename):
         level_data = {
@@ -63,68 +113,71 @@ class Game:
             json.dump(level_data, f)
 
     def load_all_levels(self):
-        levels = {}
-        for filename in os.listdir(self.levels_folder):
-            if filename.endswith('.json'):
-                level_name = os.path.splitext(filename)[0]
-                filepath = os.path.join(self.levels_folder, filename)
-                with open(filepath, 'r') as f:
-                    levels[level_name] = json.load(f)
-        return levels
+        return load_compiled_levels(self.levels_folder, self.width, self.height, WITH_BORDERS)
+
+    def snapshot(self):
+        all_goals = self.zone_goals + list(self.template.goals)
+        return GameSnapshot(
+            self.template.key,
+            self.player.rect.topleft,
+            tuple(goal.circle.center for goal in self.zone_goals),
+            tuple(all_goals.index(goal) for goal in self.goals),
+            self.nbsteps,
+            self.rng.bit_generator.state,
+            # Both are rebuilt on every cast, never modified in place
+            self.ray_distances,
+            self.ray_endpoints,
+        )
+
+    def restore(self, snapshot):
+        if snapshot.template_key != self.template.key:
+            self.template = self._template_for_key(snapshot.template_key)
+            self.current_level = self.template.level
+            self._bind_template()
+        self.player.rect.topleft = snapshot.player
+        for goal, center in zip(self.zone_goals, snapshot.zone_goals):
+            goal.place(*center)
+        all_goals = self.zone_goals + list(self.template.goals)
+        self.goals[:] = [all_goals[i] for i in snapshot.goals]
+        self.nbsteps = snapshot.nbsteps
+        self.rng.bit_generator.state = snapshot.rng_state
+        self.ray_distances = snapshot.ray_distances
+        self.ray_endpoints = snapshot.ray_endpoints
+
+    def _template_for_key(self, key):
+        # Templates built in this process are found directly; otherwise (a
+        # snapshot from another process) the level is looked up by name
+        template = LevelTemplate.by_key.get(key)
+        if template is not None:
+            return template
+        name, digest = key[:2]
+        level = self.levels.get(name)
+        if level is None and name == 'default':
+            level = self._default_level()
+        if level is None or level.digest != digest:
+            raise ValueError(f"Level '{name}' of the snapshot is not loaded")
+        return LevelTemplate.for_level(level, *key[2:])
 
     def reset(self):
-        if self.current_level:
-            self.player = Player(*self.current_level['spawn'])
-            self.walls = [Wall(*wall) for wall in self.current_level['walls']]
-            self.reward_zones = self.current_level.get('reward_zones', [])
-            self.goals = self._generate_rewards()
-
-            individual_rewards = self.current_level.get('rewards', [])
-            for reward in individual_rewards:
-                self.goals.append(Goal(*reward, 7))
-        else:
-            self.player = Player(self.width // 2, self.height // 2)
-            self.walls = []
-            self.goals = [Goal(700, 500, 7)]
-        if WITH_BORDERS:
-            self._setup_borders()
+        self.nbsteps = 0
+        self.player.place(*self.template.spawn)
+        self.goals.clear()
+        self.goals.extend(self._generate_rewards())
+        self.goals.extend(self.template.goals)
         return self._get_state(), 0, False
 
-
-    def _setup_borders(self):
-        for x in range(0, self.width, 50):
-            self.walls.append(Wall(x, 0, 50, 10))
-            self.walls.append(Wall(x, self.height - 10, 50, 10))
-        for y in range(10, self.height - 10, 50):
-            self.walls.append(Wall(0, y, 10, 50))
-            self.walls.append(Wall(self.width - 10, y, 10, 50))
-
-
     def _generate_rewards(self):
-        rewards = []
-        for zone in self.reward_zones:
-            center_x, center_y = zone['center']
-            radius = zone['radius']
-
-            while True:
-                x = random.randint(center_x - radius, center_x + radius)
-                y = random.randint(center_y - radius, center_y + radius)
-
-                # Check if the point is within the circle and at least 50 pixels from borders
-                if ((x - center_x)**2 + (y - center_y)**2 <= radius**2 and
-                    x >= 50 and x <= self.width - 50 and y >= 50 and y <= self.height - 50):
-                    rewards.append(Goal(x, y, 7))
-                    break
-
-        return rewards
-            
+        for goal, (x, y) in zip(self.zone_goals, self.template.zone_sampler.sample(self.rng).tolist()):
+            goal.place(x, y)
+        return self.zone_goals
+
     def step(self, action):
+        self.nbsteps += 1
         self.player.update(action)
         self._cast_rays()
 
-        for wall in self.walls:
-            if self.player.rect.colliderect(wall.rect):
-                return self._get_state(), -50.0, True
+        if self.occupancy.collides(self.player.rect, self.spatial_index):
+            return self._get_state(), -50.0, True
 
         for goal in self.goals:
             if goal.circle.colliderect(self.player.rect):
@@ -152,105 +205,63 @@ class Game:
         return np.concatenate(([normalized_angle, normalized_distance], self.ray_distances))
 
     def _cast_rays(self):
-        self.ray_distances = np.zeros(self.num_rays)
-        self.ray_endpoints = [None] * self.num_rays
-        for i, angle in enumerate(self.ray_angles):
-            end_pos = self._get_ray_end_pos(angle)
-            intersection = self._get_ray_intersection(end_pos)
-            if intersection:
-                ray_length = self._get_distance(self.player.rect.center, intersection)
-                normalized_distance = 1 - (ray_length / self.raycast_dist)
-                self.ray_distances[i] = normalized_distance
-                self.ray_endpoints[i] = intersection
-            else:
-                self.ray_endpoints[i] = end_pos
-
-    def _get_ray_end_pos(self, angle):
-        dx = np.cos(angle)
-        dy = np.sin(angle)
-        end_pos = (self.player.rect.center[0] + dx * self.raycast_dist, self.player.rect.center[1] + dy * self.raycast_dist)
-        return end_pos
-
-    def _get_ray_intersection(self, end_pos):
-        for wall in self.walls:
-            intersection = self._get_line_intersection(self.player.rect.center, end_pos, wall.rect)
-            if intersection:
-                return intersection
-        return None
-
-    def _get_line_intersection(self, p1, p2, rect):
-        lines = [
-            (rect.topleft, rect.topright),
-            (rect.topright, rect.bottomright),
-            (rect.bottomright, rect.bottomleft),
-            (rect.bottomleft, rect.topleft)
-        ]
-        for line in lines:
-            intersection = self._get_line_segment_intersection(p1, p2, *line)
-            if intersection:
-                return intersection
-        return None
-
-    def _get_line_segment_intersection(self, p1, p2, p3, p4):
-        x1, y1 = p1
-        x2, y2 = p2
-        x3, y3 = p3
-        x4, y4 = p4
-
-        denom = (y4-y3)*(x2-x1) - (x4-x3)*(y2-y1)
-        if denom == 0:
-            return None
-        ua = ((x4-x3)*(y1-y3) - (y4-y3)*(x1-x3)) / denom
-        if ua < 0 or ua > 1:
-            return None
-        ub = ((x2-x1)*(y1-y3) - (y2-y1)*(x1-x3)) / denom
-        if ub < 0 or ub > 1:
-            return None
-        x = x1 + ua * (x2-x1)
-        y = y1 + ua * (y2-y1)
-        return (x, y)
+        # Rays the distance field proves clear skip the exact test; the rest are
+        # intersected with the nearby wall edges in one batched pass and stop
+        # at the nearest hit.
+        origin = self.player.rect.center
+        clear = self.occupancy.clear_rays(origin, self.raycaster.ray_vectors, self.ray_trace_steps)
+        self.ray_distances, self.ray_endpoints = self.raycaster.cast(origin, ~clear)
 
     def _get_distance(self, p1, p2):
         return np.sqrt((p1[0] - p2[0])**2 + (p1[1] - p2[1])**2)
 
-    def render(self, surface):
-        surface.fill(self.colors['black'])
-        pygame.draw.rect(surface, self.colors['blue'], self.player.rect)
-        for wall in self.walls:
-            pygame.draw.rect(surface, self.colors['red'], wall.rect)
-        for goal in self.goals:
-            pygame.draw.circle(surface, self.colors['green'], goal.circle.center, goal.radius)
-
-        # Draw raycasts
-        for i, end_point in enumerate(self.ray_endpoints):
-            if end_point:
-                pygame.draw.line(surface, self.colors['yellow'], self.player.rect.center, end_point)
-                if self.ray_distances[i] > 0:
-                    pygame.draw.circle(surface, self.colors['purple'], end_point, 3)
-
-        # Draw line to objective
-        if self.goals:
-            goal = self.goals[0]
-            pygame.draw.line(surface, self.colors['white'], self.player.rect.center, goal.circle.center)
-            midpoint = ((self.player.rect.centerx + goal.circle.centerx) // 2,
-                        (self.player.rect.centery + goal.circle.centery) // 2)
-            distance = self._get_distance(self.player.rect.center, goal.circle.center)
-            angle = np.arctan2(goal.circle.centery - self.player.rect.centery,
-                               goal.circle.centerx - self.player.rect.centerx)
-            angle_deg = np.degrees(angle)
-            font = pygame.font.Font(None, 24)
-            text = font.render(f"{distance:.1f}px, {angle_deg:.1f}°", True, self.colors['white'])
-            surface.blit(text, midpoint)
-
-        # Draw reward zones
-        for zone in self.reward_zones:
-            pygame.draw.circle(surface, self.colors['reward_zone'], zone['center'], zone['radius'], 2)
+    def render(self, surface, dirty=False):
+        # Drawing lives in game_renderer so headless use never imports pygame
+        if self.renderer is None:
+            from game_renderer import GameRenderer
+            self.renderer = GameRenderer()
+        return self.renderer.render(self, surface, dirty)
+
+class LevelTemplate:
+    # Immutable, shareable view of a compiled level: walls, spatial index and
+    # fixed goals are built once and reused by every Game on that level.
+    # key names the template without referencing it, for snapshots.
+    _cache = {}
+    by_key = {}
+
+    def __init__(self, level, width, height, grid_cell_size, occupancy_resolution, raycast_dist):
+        self.level = level
+        self.key = (level.name, level.digest, width, height, grid_cell_size, occupancy_resolution, raycast_dist)
+        self.spawn = level.spawn
+        self.walls = tuple(Wall(*rect) for rect in level.rects.tolist())
+        self.edge_starts, self.edge_vectors, self.edge_offsets = level.edge_starts, level.edge_vectors, level.edge_offsets
+        self.spatial_index = UniformGrid(level.rects, width, height, grid_cell_size, margin=raycast_dist)
+        self.occupancy = level.occupancy(width, height, occupancy_resolution, margin=raycast_dist)
+        self.reward_zones = level.reward_zones
+        self.zone_sampler = level.zone_sampler(width, height)
+        self.goals = tuple(Goal(*reward, 7) for reward in level.rewards)
+
+    @classmethod
+    def for_level(cls, level, width, height, grid_cell_size, occupancy_resolution, raycast_dist):
+        key = (level, width, height, grid_cell_size, occupancy_resolution, raycast_dist)
+        if key not in cls._cache:
+            template = cls._cache[key] = cls(level, width, height, grid_cell_size, occupancy_resolution, raycast_dist)
+            cls.by_key[template.key] = template
+        return cls._cache[key]
+
+
+SCREEN_RECT = Rect(0, 0, SCREEN_WIDTH, SCREEN_HEIGHT)
+
 
 class Player:
     def __init__(self, x, y):
-        self.rect = pygame.Rect(x+3, y+3, 10, 10)
+        self.rect = Rect(x+3, y+3, 10, 10)
         self.speed = 4
 
+    def place(self, x, y):
+        self.rect.x = x + 3
+        self.rect.y = y + 3
+
     def update(self, action):
         if action == 0:  # right
             self.rect.x += self.speed
@@ -262,13 +273,17 @@ class Player:
             self.rect.y += self.speed
 
         # Collision detection with screen boundaries
-        self.rect.clamp_ip(pygame.Rect(0, 0, SCREEN_WIDTH, SCREEN_HEIGHT))
+        self.rect.clamp_ip(SCREEN_RECT)
 
 class Wall:
     def __init__(self, x, y, width, height):
-        self.rect = pygame.Rect(x, y, width, height)
+        self.rect = Rect(x, y, width, height)
 
 class Goal:
     def __init__(self, x, y, radius):
-        self.circle = pygame.Rect(x - radius, y - radius, radius * 2, radius * 2)
-        self.radius = radius
\ No newline at end of file
+        self.circle = Rect(x - radius, y - radius, radius * 2, radius * 2)
+        self.radius = radius
+
+    def place(self, x, y):
+        self.circle.x = x - self.radius
+        self.circle.y = y - self.radius
@@ -0,0 +1,78 @@
+import pygame
+import numpy as np
+from text_cache import get_font, TextSlots
+
+
+class GameRenderer:
+    # Draws a Game onto a pygame surface. Walls and reward zones only change
+    # with the level, so they are drawn once into a cached background that
+    # every frame starts from; only the player, goals, rays and label are
+    # drawn per frame.
+    # With dirty=True only the areas drawn on the previous frame are restored
+    # from the background, which assumes nothing else drew on the surface in
+    # between, and render() returns the rects that changed for
+    # pygame.display.update.
+    def __init__(self):
+        self.background = None
+        self.background_key = None
+        self.drawn = None
+        self.target = None
+        self.label = None
+
+    def _background(self, game, surface):
+        key = (game.template, surface.get_size())
+        if key != self.background_key:
+            self.background = pygame.Surface(surface.get_size(), 0, surface)
+            self.background.fill(game.colors['black'])
+            for wall in game.walls:
+                pygame.draw.rect(self.background, game.colors['red'], tuple(wall.rect))
+            for zone in game.reward_zones:
+                pygame.draw.circle(self.background, game.colors['reward_zone'], zone['center'], zone['radius'], 2)
+            self.background_key = key
+            self.drawn = None
+        return self.background
+
+    def render(self, game, surface, dirty=False):
+        background = self._background(game, surface)
+        if dirty and self.drawn is not None and surface is self.target:
+            for rect in self.drawn:
+                surface.blit(background, rect, rect)
+        else:
+            surface.blit(background, (0, 0))
+            dirty = False
+
+        drawn = self._draw_dynamic(game, surface)
+        changed = self.drawn + drawn if dirty else [surface.get_rect()]
+        self.drawn = drawn
+        self.target = surface
+        return changed
+
+    def _draw_dynamic(self, game, surface):
+        # Returns the bounding rects of everything drawn
+        colors = game.colors
+        player = game.player.rect
+        drawn = [pygame.draw.rect(surface, colors['blue'], tuple(player))]
+        for goal in game.goals:
+            drawn.append(pygame.draw.circle(surface, colors['green'], goal.circle.center, goal.radius))
+
+        # Draw raycasts
+        for i, end_point in enumerate(game.ray_endpoints):
+            if end_point:
+                drawn.append(pygame.draw.line(surface, colors['yellow'], player.center, end_point))
+                if game.ray_distances[i] > 0:
+                    drawn.append(pygame.draw.circle(surface, colors['purple'], end_point, 3))
+
+        # Draw line to objective
+        if game.goals:
+            goal = game.goals[0]
+            drawn.append(pygame.draw.line(surface, colors['white'], player.center, goal.circle.center))
+            midpoint = ((player.centerx + goal.circle.centerx) // 2,
+                        (player.centery + goal.circle.centery) // 2)
+            distance = game._get_distance(player.center, goal.circle.center)
+            angle = np.arctan2(goal.circle.centery - player.centery, goal.circle.centerx - player.centerx)
+            angle_deg = np.degrees(angle)
+            if self.label is None:
+                self.label = TextSlots(colors['white'], get_font(24))
+            text = self.label.render('goal', f"{distance:.1f}px, {angle_deg:.1f}°")
+            drawn.append(surface.blit(text, midpoint))
+        return drawn
@@ -0,0 +1,124 @@
+class Rect:
+    # Minimal stand-in for pygame.Rect covering what the simulation uses, so
+    # the game core can run without importing pygame. Collision and clamping
+    # follow pygame's rules exactly.
+    __slots__ = ('x', 'y', 'w', 'h')
+
+    def __init__(self, x, y, w, h):
+        self.x = int(x)
+        self.y = int(y)
+        self.w = int(w)
+        self.h = int(h)
+
+    def __iter__(self):
+        return iter((self.x, self.y, self.w, self.h))
+
+    def __len__(self):
+        return 4
+
+    def __getitem__(self, index):
+        return (self.x, self.y, self.w, self.h)[index]
+
+    def __eq__(self, other):
+        return tuple(self) == tuple(other)
+
+    def __repr__(self):
+        return f"<Rect({self.x}, {self.y}, {self.w}, {self.h})>"
+
+    @property
+    def width(self):
+        return self.w
+
+    @width.setter
+    def width(self, value):
+        self.w = int(value)
+
+    @property
+    def height(self):
+        return self.h
+
+    @height.setter
+    def height(self, value):
+        self.h = int(value)
+
+    @property
+    def left(self):
+        return self.x
+
+    @property
+    def top(self):
+        return self.y
+
+    @property
+    def right(self):
+        return self.x + self.w
+
+    @property
+    def bottom(self):
+        return self.y + self.h
+
+    @property
+    def centerx(self):
+        return self.x + self.w // 2
+
+    @property
+    def centery(self):
+        return self.y + self.h // 2
+
+    @property
+    def center(self):
+        return (self.centerx, self.centery)
+
+    @center.setter
+    def center(self, value):
+        self.x = int(value[0]) - self.w // 2
+        self.y = int(value[1]) - self.h // 2
+
+    @property
+    def topleft(self):
+        return (self.x, self.y)
+
+    @topleft.setter
+    def topleft(self, value):
+        self.x = int(value[0])
+        self.y = int(value[1])
+
+    @property
+    def topright(self):
+        return (self.x + self.w, self.y)
+
+    @property
+    def bottomleft(self):
+        return (self.x, self.y + self.h)
+
+    @property
+    def bottomright(self):
+        return (self.x + self.w, self.y + self.h)
+
+    def copy(self):
+        return Rect(self.x, self.y, self.w, self.h)
+
+    def colliderect(self, other):
+        ox, oy, ow, oh = other
+        if self.w == 0 or self.h == 0 or ow == 0 or oh == 0:
+            return False
+        return (min(self.x, self.x + self.w) < max(ox, ox + ow) and
+                min(self.y, self.y + self.h) < max(oy, oy + oh) and
+                max(self.x, self.x + self.w) > min(ox, ox + ow) and
+                max(self.y, self.y + self.h) > min(oy, oy + oh))
+
+    def collidepoint(self, x, y=None):
+        if y is None:
+            x, y = x
+        return self.x <= x < self.x + self.w and self.y <= y < self.y + self.h
+
+    def clamp_ip(self, bounds):
+        bx, by, bw, bh = bounds
+        if self.w >= bw:
+            self.x = bx + bw // 2 - self.w // 2
+        else:
+            self.x = min(max(self.x, bx), bx + bw - self.w)
+        if self.h >= bh:
+            self.y = by + bh // 2 - self.h // 2
+        else:
+            self.y = min(max(self.y, by), by + bh - self.h)
@@ -0,0 +1,54 @@
+import numpy as np
+
+# Goals are never placed closer than this to the screen borders
+SAFE_MARGIN = 50
+
+
+def zone_points(center, radius, rects, width, height, margin=SAFE_MARGIN):
+    # Every integer point inside the zone circle, inside the safe rectangle and
+    # outside the walls, as an [P, 2] array of (x, y)
+    center_x, center_y = center
+    x0, x1 = max(center_x - radius, margin), min(center_x + radius, width - margin)
+    y0, y1 = max(center_y - radius, margin), min(center_y + radius, height - margin)
+    if x0 > x1 or y0 > y1:
+        raise ValueError(f"Reward zone at {tuple(center)} with radius {radius} lies outside the safe area")
+
+    xs = np.arange(x0, x1 + 1)
+    ys = np.arange(y0, y1 + 1)
+    valid = (xs[None, :] - center_x)**2 + (ys[:, None] - center_y)**2 <= radius**2
+    for x, y, w, h in np.asarray(rects, dtype=np.int64).reshape(-1, 4).tolist():
+        valid[max(y - y0, 0):max(y + h - y0, 0), max(x - x0, 0):max(x + w - x0, 0)] = False
+
+    rows, cols = np.nonzero(valid)
+    if not len(rows):
+        raise ValueError(f"Reward zone at {tuple(center)} with radius {radius} has no free goal position")
+    return np.stack((xs[cols], ys[rows]), axis=1).astype(np.int32)
+
+
+class ZoneSampler:
+    # Valid goal positions of every reward zone of a level, precomputed once so
+    # that drawing a goal is a single index draw per zone whatever the zone
+    # geometry. Draws follow the same uniform distribution as rejection sampling.
+    # Zone z owns points[offsets[z]:offsets[z + 1]].
+    def __init__(self, zone_centers, zone_radii, rects, width, height, margin=SAFE_MARGIN):
+        zones = [zone_points(center, radius, rects, width, height, margin)
+                 for center, radius in zip(np.asarray(zone_centers).reshape(-1, 2).tolist(),
+                                           np.asarray(zone_radii).tolist())]
+        self.counts = np.array([len(points) for points in zones], dtype=np.int64)
+        self.offsets = np.cumsum(self.counts) - self.counts
+        self.points = np.concatenate(zones) if zones else np.zeros((0, 2), dtype=np.int32)
+
+    def __len__(self):
+        return len(self.counts)
+
+    def sample(self, rng):
+        # One goal per zone, as an [Z, 2] array
+        return self.points[self.offsets + rng.integers(self.counts)]
+
+    def sample_batch(self, rngs):
+        # One goal per zone for every generator in rngs, as an [N, Z, 2] array.
+        # Each env keeps its own generator so its goals only depend on its seed.
+        if not len(rngs):
+            return np.zeros((0, len(self.counts), 2), dtype=np.int32)
+        indices = np.stack([rng.integers(self.counts) for rng in rngs])
+        return self.points[self.offsets + indices]
@@ -0,0 +1,203 @@
+import os
+import json
+import hashlib
+import tempfile
+import zipfile
+import numpy as np
+from level_optimizer import optimize_walls
+from occupancy import OccupancyGrid
+from goal_sampler import ZoneSampler
+
+CACHE_VERSION = 4
+CACHE_FOLDER = ".compiled"
+
+# Process-wide cache shared by every Game: filepath -> (stat key, CompiledLevel)
+_compiled_levels = {}
+
+
+def border_rects(width, height):
+    rects = []
+    for x in range(0, width, 50):
+        rects.append((x, 0, 50, 10))
+        rects.append((x, height - 10, 50, 10))
+    for y in range(10, height - 10, 50):
+        rects.append((0, y, 10, 50))
+        rects.append((width - 10, y, 10, 50))
+    return rects
+
+
+class CompiledLevel:
+    # Packed, read-only form of a level JSON. rects is the optimized cover of
+    # the level walls and borders (when enabled); the edge arrays only hold
+    # the outline of that cover, rect i owning edges edge_offsets[i]:edge_offsets[i + 1].
+    def __init__(self, name, rects, edge_starts, edge_vectors, edge_offsets, spawn, rewards, zone_centers, zone_radii):
+        self.name = name
+        self.rects = rects
+        self.edge_starts = edge_starts
+        self.edge_vectors = edge_vectors
+        self.edge_offsets = edge_offsets
+        self.spawn = tuple(spawn.tolist())
+        self.rewards = [tuple(reward) for reward in rewards.tolist()]
+        self.zone_centers = zone_centers
+        self.zone_radii = zone_radii
+        self.reward_zones = [{'center': tuple(center), 'radius': radius}
+                             for center, radius in zip(zone_centers.tolist(), zone_radii.tolist())]
+        # Set by load_compiled_level when the level comes from a file
+        self.digest = None
+        self.cache_path = None
+        self._occupancy = {}
+        self._zone_samplers = {}
+
+    @property
+    def nb_goals(self):
+        return len(self.reward_zones) + len(self.rewards)
+
+    def occupancy(self, width, height, resolution=1, margin=0):
+        # Built once per resolution and stored next to the compiled level
+        key = (width, height, resolution, margin)
+        if key in self._occupancy:
+            return self._occupancy[key]
+
+        arrays = None
+        cache_path = None
+        if self.cache_path is not None:
+            cache_path = self.cache_path.replace('.npz', f"-occ{resolution}m{margin}.npz")
+            cached = _read_npz(cache_path)
+            if cached is not None and cached.pop('digest').tobytes() == self.digest:
+                arrays = cached
+        grid = OccupancyGrid(self.rects, width, height, resolution, margin, arrays)
+        if arrays is None and cache_path is not None:
+            _write_npz(cache_path, digest=np.frombuffer(self.digest, dtype=np.uint8), **grid.arrays())
+
+        self._occupancy[key] = grid
+        return grid
+
+    def zone_sampler(self, width, height):
+        key = (width, height)
+        if key not in self._zone_samplers:
+            self._zone_samplers[key] = ZoneSampler(self.zone_centers, self.zone_radii, self.rects, width, height)
+        return self._zone_samplers[key]
+
+    def arrays(self):
+        return {
+            'rects': self.rects,
+            'edge_starts': self.edge_starts,
+            'edge_vectors': self.edge_vectors,
+            'edge_offsets': self.edge_offsets,
+            'spawn': np.array(self.spawn, dtype=np.int64),
+            'rewards': np.array(self.rewards, dtype=np.int64).reshape(-1, 2),
+            'zone_centers': self.zone_centers,
+            'zone_radii': self.zone_radii,
+        }
+
+
+def compile_level(name, data, width, height, with_borders=True):
+    walls = np.array(data['walls'], dtype=np.int64).reshape(-1, 4)
+    rects = walls
+    if with_borders:
+        rects = np.concatenate((walls, np.array(border_rects(width, height), dtype=np.int64)))
+    zones = data.get('reward_zones', [])
+    return CompiledLevel(
+        name,
+        *optimize_walls(rects),
+        np.array(data['spawn'], dtype=np.int64),
+        np.array(data.get('rewards', []), dtype=np.int64).reshape(-1, 2),
+        np.array([zone['center'] for zone in zones], dtype=np.int64).reshape(-1, 2),
+        np.array([zone['radius'] for zone in zones], dtype=np.int64),
+    )
+
+
+def _cache_path(filepath, width, height, with_borders):
+    folder, filename = os.path.split(filepath)
+    name = os.path.splitext(filename)[0]
+    return os.path.join(folder, CACHE_FOLDER, f"{name}-{width}x{height}{'-b' if with_borders else ''}.npz")
+
+
+def _read_npz(path):
+    try:
+        with np.load(path) as cached:
+            arrays = {key: cached[key] for key in cached.files}
+    except (OSError, ValueError, KeyError, EOFError, zipfile.BadZipFile):
+        # Missing, truncated or foreign file: a cache miss, recompiled by the caller
+        return None
+    if arrays.pop('version', None) != CACHE_VERSION:
+        return None
+    return arrays
+
+
+def _write_npz(path, **arrays):
+    # Written to a temporary file then renamed, so processes reading the
+    # cache concurrently see either no file or a complete one
+    folder = os.path.dirname(path)
+    tmp_path = None
+    try:
+        os.makedirs(folder, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=folder, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            np.savez_compressed(f, version=np.array(CACHE_VERSION), **arrays)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        print(f"Could not write level cache '{path}': {e}")
+        if tmp_path is not None and os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def _load_cached(cache_path, stat_key, read_source):
+    # Returns (arrays, source bytes if they had to be read), arrays being None on a miss
+    arrays = _read_npz(cache_path)
+    if arrays is None:
+        return None, None
+    if tuple(arrays.pop('stat_key')) == stat_key:
+        return arrays, None
+
+    # The file was touched: it is still valid if the content did not change
+    source = read_source()
+    if arrays['digest'].tobytes() == hashlib.sha1(source).digest():
+        return arrays, source
+    return None, source
+
+
+def _save_cached(cache_path, level, stat_key):
+    _write_npz(cache_path, stat_key=np.array(stat_key),
+               digest=np.frombuffer(level.digest, dtype=np.uint8), **level.arrays())
+
+
+def load_compiled_level(filepath, width, height, with_borders=True):
+    stat = os.stat(filepath)
+    stat_key = (stat.st_mtime_ns, stat.st_size, width, height, int(with_borders))
+    memo = _compiled_levels.get(filepath)
+    if memo is not None and memo[0] == stat_key:
+        return memo[1]
+
+    def read_source():
+        with open(filepath, 'rb') as f:
+            return f.read()
+
+    name = os.path.splitext(os.path.basename(filepath))[0]
+    cache_path = _cache_path(filepath, width, height, with_borders)
+    arrays, source = _load_cached(cache_path, stat_key, read_source)
+    if arrays is not None:
+        digest = arrays.pop('digest').tobytes()
+        level = CompiledLevel(name, **arrays)
+        level.digest, level.cache_path = digest, cache_path
+        if source is not None:
+            _save_cached(cache_path, level, stat_key)
+    else:
+        if source is None:
+            source = read_source()
+        level = compile_level(name, json.loads(source), width, height, with_borders)
+        level.digest, level.cache_path = hashlib.sha1(source).digest(), cache_path
+        _save_cached(cache_path, level, stat_key)
+
+    _compiled_levels[filepath] = (stat_key, level)
+    return level
+
+
+def load_compiled_levels(levels_folder, width, height, with_borders=True):
+    levels = {}
+    for filename in os.listdir(levels_folder):
+        if filename.endswith('.json'):
+            level_name = os.path.splitext(filename)[0]
+            filepath = os.path.join(levels_folder, filename)
+            levels[level_name] = load_compiled_level(filepath, width, height, with_borders)
+    return levels
@@ -1,6 +1,9 @@
 import pygame
 import json
 import os
+from level_optimizer import merge_rects
+from frame_scheduler import FrameScheduler
+from text_cache import get_font, render_text
 
 class LevelEditor:
     def __init__(self, width, height):
@@ -26,7 +29,7 @@ class LevelEditor:
             'toolbar': (50, 50, 50),
             'reward_zone': (0, 255, 0, 128),
         }
-        self.font = pygame.font.Font(None, 24)
+        self.font = get_font(24)
         self.wall_start = None
         self.levels_folder = "levelsdata"
         os.makedirs(self.levels_folder, exist_ok=True)
@@ -36,8 +39,9 @@ class LevelEditor:
 
     def run(self, screen):
         running = True
+        scheduler = FrameScheduler()
         while running:
-            for event in pygame.event.get():
+            for event in scheduler.wait_events():
                 if event.type == pygame.QUIT:
                     running = False
                 elif event.type == pygame.MOUSEBUTTONDOWN:
@@ -55,7 +59,7 @@ class LevelEditor:
                         self.load_level_menu(screen)
 
             self.draw(screen)
-            pygame.display.flip()
+            scheduler.flip()
 
     def draw(self, screen):
         # Draw game area
@@ -219,7 +223,7 @@ class LevelEditor:
         self.reward_zones = []
 
     def draw_text(self, screen, text, pos):
-        text_surface = self.font.render(text, True, self.colors['text'])
+        text_surface = render_text(text, self.colors['text'], self.font)
         text_rect = text_surface.get_rect(center=pos)
         screen.blit(text_surface, text_rect)
 
@@ -237,8 +241,9 @@ class LevelEditor:
     def text_input(self, screen, prompt):
         input_text = ""
         input_active = True
+        scheduler = FrameScheduler()
         while input_active:
-            for event in pygame.event.get():
+            for event in scheduler.wait_events():
                 if event.type == pygame.QUIT:
                     return None
                 if event.type == pygame.KEYDOWN:
@@ -253,7 +258,7 @@ class LevelEditor:
             self.draw_text(screen, prompt, (self.width // 2, self.height // 2 - 50))
             pygame.draw.rect(screen, self.colors['button'], (self.width // 2 - 100, self.height // 2, 200, 40))
             self.draw_text(screen, input_text, (self.width // 2, self.height // 2 + 20))
-            pygame.display.flip()
+            scheduler.flip()
 
         return input_text
 
@@ -265,8 +270,9 @@ class LevelEditor:
         max_buttons = 8
         scroll_offset = 0
 
+        scheduler = FrameScheduler()
         while True:
-            for event in pygame.event.get():
+            for event in scheduler.wait_events():
                 if event.type == pygame.QUIT:
                     return None
                 if event.type == pygame.MOUSEBUTTONDOWN:
@@ -304,7 +310,7 @@ class LevelEditor:
             pygame.draw.rect(screen, self.colors['button'], self.back_button)
             self.draw_text(screen, "Back", self.back_button.center)
 
-            pygame.display.flip()
+            scheduler.flip()
 
     def get_available_levels(self):
         return [f for f in os.listdir(self.levels_folder) if f.endswith('.json')]
@@ -323,8 +329,10 @@ class LevelEditor:
             print(f"Level file '{filepath}' not found")
 
     def save_level(self, filename):
+        # Overlapping and touching walls are merged into fewer rects covering the
+        # same area in the file only; the editor keeps the walls as drawn
         level_data = {
-            'walls': [(wall.x, wall.y, wall.width, wall.height) for wall in self.walls],
+            'walls': merge_rects([tuple(wall) for wall in self.walls]).tolist(),
             'spawn': self.spawn,
             'rewards': self.goals,
             'reward_zones': self.reward_zones
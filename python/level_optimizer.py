@@ -0,0 +1,83 @@
+import numpy as np
+
+
+def _runs(mask):
+    # Start/end (exclusive) indices of every run of True values
+    padded = np.concatenate(([False], mask, [False]))
+    changes = np.flatnonzero(padded[1:] != padded[:-1])
+    return zip(changes[0::2].tolist(), changes[1::2].tolist())
+
+
+def _occupancy(rects):
+    # Coordinate-compressed occupancy of the union of rects: cell (r, c) spans
+    # xs[c]..xs[c+1] by ys[r]..ys[r+1]
+    x0 = np.minimum(rects[:, 0], rects[:, 0] + rects[:, 2])
+    y0 = np.minimum(rects[:, 1], rects[:, 1] + rects[:, 3])
+    x1 = np.maximum(rects[:, 0], rects[:, 0] + rects[:, 2])
+    y1 = np.maximum(rects[:, 1], rects[:, 1] + rects[:, 3])
+    xs = np.unique(np.concatenate((x0, x1)))
+    ys = np.unique(np.concatenate((y0, y1)))
+    grid = np.zeros((max(len(ys) - 1, 0), max(len(xs) - 1, 0)), dtype=bool)
+    cols0, cols1 = np.searchsorted(xs, x0), np.searchsorted(xs, x1)
+    rows0, rows1 = np.searchsorted(ys, y0), np.searchsorted(ys, y1)
+    for r0, r1, c0, c1 in zip(rows0.tolist(), rows1.tolist(), cols0.tolist(), cols1.tolist()):
+        grid[r0:r1, c0:c1] = True
+    return xs, ys, grid
+
+
+def _merge_cells(grid):
+    # Greedy cover: take each free horizontal run and grow it down while the
+    # rows below are fully occupied. The blocks are disjoint and cover the grid.
+    used = np.zeros_like(grid)
+    blocks = []
+    rows = grid.shape[0]
+    for r in range(rows):
+        for c0, c1 in _runs(grid[r] & ~used[r]):
+            r1 = r + 1
+            while r1 < rows and grid[r1, c0:c1].all() and not used[r1, c0:c1].any():
+                r1 += 1
+            used[r:r1, c0:c1] = True
+            blocks.append((r, r1, c0, c1))
+    return blocks
+
+
+def _exposed_sides(grid, xs, ys, block):
+    # Parts of the block outline that face empty space, as (x0, y0, x1, y1)
+    r0, r1, c0, c1 = block
+    rows, cols = grid.shape
+    segments = []
+    exposed = ~grid[r0 - 1, c0:c1] if r0 > 0 else np.ones(c1 - c0, dtype=bool)
+    segments += [(xs[c0 + a], ys[r0], xs[c0 + b], ys[r0]) for a, b in _runs(exposed)]
+    exposed = ~grid[r0:r1, c1] if c1 < cols else np.ones(r1 - r0, dtype=bool)
+    segments += [(xs[c1], ys[r0 + a], xs[c1], ys[r0 + b]) for a, b in _runs(exposed)]
+    exposed = ~grid[r1, c0:c1] if r1 < rows else np.ones(c1 - c0, dtype=bool)
+    segments += [(xs[c0 + b], ys[r1], xs[c0 + a], ys[r1]) for a, b in _runs(exposed)]
+    exposed = ~grid[r0:r1, c0 - 1] if c0 > 0 else np.ones(r1 - r0, dtype=bool)
+    segments += [(xs[c0], ys[r0 + b], xs[c0], ys[r0 + a]) for a, b in _runs(exposed)]
+    return segments
+
+
+def optimize_walls(rects):
+    # Replaces a list of axis-aligned wall rects by a smaller set of disjoint
+    # rects covering exactly the same area, plus the outline edges of that
+    # area grouped per rect (rect i owns edges offsets[i]:offsets[i + 1]).
+    # Since the covered area is unchanged, strict-overlap collisions are too.
+    rects = np.asarray(rects, dtype=np.int64).reshape(-1, 4)
+    rects = rects[(rects[:, 2] != 0) & (rects[:, 3] != 0)]
+    xs, ys, grid = _occupancy(rects)
+
+    merged, segments, offsets = [], [], [0]
+    for block in _merge_cells(grid):
+        r0, r1, c0, c1 = block
+        merged.append((xs[c0], ys[r0], xs[c1] - xs[c0], ys[r1] - ys[r0]))
+        segments += _exposed_sides(grid, xs, ys, block)
+        offsets.append(len(segments))
+
+    segments = np.array(segments, dtype=np.float64).reshape(-1, 4)
+    return (np.array(merged, dtype=np.int64).reshape(-1, 4),
+            segments[:, :2], segments[:, 2:] - segments[:, :2],
+            np.array(offsets, dtype=np.int64))
+
+
+def merge_rects(rects):
+    return optimize_walls(rects)[0]
@@ -1,22 +1,32 @@
 import pygame
+import threading
+import importlib
 from game import Game
 from player_mode import PlayerMode
-from ai_mode import AIMode
 from level_editor import LevelEditor
 from curriculum_editor import curriculum_editor_mode
+from frame_scheduler import FrameScheduler
+from text_cache import get_font, render_text
 
 SCREEN_WIDTH = 1200
 SCREEN_HEIGHT = 600
 GAME_WIDTH = 800
 GAME_HEIGHT = 600
 
+def warm_up_ai_mode():
+    # AI Mode pulls in PyTorch, which takes seconds to import. Importing it in
+    # the background while the menu is up keeps startup fast; choosing AI Mode
+    # before it is done just waits for the same import to finish.
+    threading.Thread(target=importlib.import_module, args=('ai_mode',), daemon=True).start()
+
 def main():
     pygame.init()
     screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
     pygame.display.set_caption("AI Training Environment")
-    font = pygame.font.Font(None, 24)
+    font = get_font(24)
 
     game = Game()
+    warm_up_ai_mode()
 
     running = True
     mode = main_menu(screen, font)
@@ -30,6 +40,7 @@ def main():
             player_mode = PlayerMode(screen, font, game)
             mode = player_mode.run()
         elif mode == 'ai':
+            from ai_mode import AIMode
             ai_mode = AIMode(screen, font, game)
             mode = ai_mode.run()
         elif mode == 'editor':
@@ -52,11 +63,12 @@ def main_menu(screen, font):
         pygame.Rect(450, 400, 300, 50)  # New button for Curriculum Editor
     ]
 
+    scheduler = FrameScheduler()
     while True:
         screen.fill((0, 0, 0))
         draw_text(screen, font, 'Main Menu', (255, 255, 255), (SCREEN_WIDTH // 2, 50))
 
-        for event in pygame.event.get():
+        for event in scheduler.wait_events():
             if event.type == pygame.QUIT:
                 return None
             if event.type == pygame.MOUSEBUTTONDOWN:
@@ -78,10 +90,10 @@ def main_menu(screen, font):
         draw_text(screen, font, 'Level Editor', (255, 255, 255), buttons[2].center)
         draw_text(screen, font, 'Curriculum Editor (WIP)', (255, 255, 255), buttons[3].center)  # New button text
 
-        pygame.display.flip()
+        scheduler.flip()
 
 def draw_text(screen, font, text, color, position):
-    text_surface = font.render(text, True, color)
+    text_surface = render_text(text, color, font)
     text_rect = text_surface.get_rect(center=position)
     screen.blit(text_surface, text_rect)
 
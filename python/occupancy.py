@@ -0,0 +1,134 @@
+import math
+import numpy as np
+
+
+def rect_distance_field(rects, xs, ys):
+    # Euclidean distance from every (ys[r], xs[c]) sample to the nearest rect,
+    # 0 inside a rect. Computed a band of rows at a time to bound memory.
+    field = np.full((len(ys), len(xs)), np.inf, dtype=np.float32)
+    if not len(rects):
+        return field
+    x0, y0 = rects[:, 0], rects[:, 1]
+    x1, y1 = x0 + rects[:, 2], y0 + rects[:, 3]
+    dx = np.maximum(np.maximum(x0[None, :] - xs[:, None], xs[:, None] - x1[None, :]), 0)
+    band = max(1, 2**22 // (len(xs) * len(rects)))
+    for start in range(0, len(ys), band):
+        y = ys[start:start + band, None]
+        dy = np.maximum(np.maximum(y0[None, :] - y, y - y1[None, :]), 0)
+        field[start:start + band] = np.sqrt(dx[None, :, :]**2 + dy[:, None, :]**2).min(axis=2)
+    return field
+
+
+class OccupancyGrid:
+    # Rasterized walls of a level. occupied marks cells overlapping a wall
+    # interior, full marks cells lying entirely inside walls, and distance holds
+    # the distance from each cell center to the nearest wall.
+    # At resolution 1 with integer walls every cell is either free or full, so
+    # a rect collision is a single integral-image lookup.
+    def __init__(self, rects, width, height, resolution=1, margin=0, arrays=None):
+        rects = np.asarray(rects, dtype=np.int64).reshape(-1, 4)
+        self.resolution = resolution
+        self.origin = (-margin, -margin)
+        self.cols = int(math.ceil((width + 2 * margin) / resolution))
+        self.rows = int(math.ceil((height + 2 * margin) / resolution))
+        # Only the distance field is worth caching; the bitmaps rasterize in
+        # a few milliseconds
+        self.occupied, self.full = self._rasterize(rects)
+        if arrays is None:
+            arrays = {'distance': self._distance_field(rects)}
+        self.distance = arrays['distance']
+        self.occupied_sum = self._integral(self.occupied)
+        self.full_sum = self._integral(self.full)
+        # Largest gap between a point and the center of its cell
+        self.slack = resolution * math.sqrt(2) / 2 + 1e-6
+
+    def arrays(self):
+        return {'distance': self.distance}
+
+    def _rasterize(self, rects):
+        res = self.resolution
+        ox, oy = self.origin
+        occupied = np.zeros((self.rows, self.cols), dtype=bool)
+        full = np.zeros((self.rows, self.cols), dtype=bool)
+        for x, y, w, h in rects.tolist():
+            if w == 0 or h == 0:
+                continue
+            # Cells overlapping the open rect, and cells fully inside it
+            c0, c1 = math.floor((x - ox) / res), math.ceil((x + w - ox) / res)
+            r0, r1 = math.floor((y - oy) / res), math.ceil((y + h - oy) / res)
+            occupied[max(r0, 0):max(r1, 0), max(c0, 0):max(c1, 0)] = True
+            c0, c1 = math.ceil((x - ox) / res), math.floor((x + w - ox) / res)
+            r0, r1 = math.ceil((y - oy) / res), math.floor((y + h - oy) / res)
+            full[max(r0, 0):max(r1, 0), max(c0, 0):max(c1, 0)] = True
+        return occupied, full
+
+    def _distance_field(self, rects):
+        res = self.resolution
+        ox, oy = self.origin
+        xs = ox + (np.arange(self.cols) + 0.5) * res
+        ys = oy + (np.arange(self.rows) + 0.5) * res
+        return rect_distance_field(rects, xs, ys)
+
+    @staticmethod
+    def _integral(mask):
+        integral = np.zeros((mask.shape[0] + 1, mask.shape[1] + 1), dtype=np.int32)
+        np.cumsum(np.cumsum(mask, axis=0), axis=1, out=integral[1:, 1:])
+        return integral
+
+    def _cell_range(self, x, y, width, height):
+        res = self.resolution
+        ox, oy = self.origin
+        c0 = min(max(int((x - ox) // res), 0), self.cols)
+        r0 = min(max(int((y - oy) // res), 0), self.rows)
+        c1 = min(max(-int(-(x + width - ox) // res), 0), self.cols)
+        r1 = min(max(-int(-(y + height - oy) // res), 0), self.rows)
+        return r0, r1, c0, c1
+
+    def collides(self, rect, index):
+        # index is the level's spatial index, used for an exact test only when
+        # the rect overlaps partially covered cells (resolution > 1)
+        x, y, width, height = rect
+        if width == 0 or height == 0:
+            return False
+        r0, r1, c0, c1 = self._cell_range(x, y, width, height)
+        s = self.occupied_sum
+        if s[r1, c1] - s[r0, c1] - s[r1, c0] + s[r0, c0] == 0:
+            return False
+        s = self.full_sum
+        if s[r1, c1] - s[r0, c1] - s[r1, c0] + s[r0, c0] > 0:
+            return True
+        return index.collides(rect)
+
+    def _distance_at(self, x, y):
+        col = min(max(int((x - self.origin[0]) // self.resolution), 0), self.cols - 1)
+        row = min(max(int((y - self.origin[1]) // self.resolution), 0), self.rows - 1)
+        return self.distance[row, col] - self.slack
+
+    def clear_rays(self, origin, ray_vectors, max_iterations=0):
+        # Marks the rays that provably reach their end without touching a wall;
+        # the others need an exact intersection test. All rays are clear when
+        # the origin is farther from every wall than the longest ray. Past that,
+        # rays are sphere-traced for up to max_iterations steps through the
+        # distance field, giving up on rays whose steps shrink below a cell.
+        res = self.resolution
+        ox, oy = self.origin
+        origin = np.asarray(origin, dtype=np.float64)
+        lengths = np.hypot(ray_vectors[:, 0], ray_vectors[:, 1])
+        if self._distance_at(*origin) > lengths.max():
+            return np.ones(len(ray_vectors), dtype=bool)
+        directions = ray_vectors / lengths[:, None]
+        travelled = np.zeros(len(ray_vectors))
+        clear = np.zeros(len(ray_vectors), dtype=bool)
+        active = np.ones(len(ray_vectors), dtype=bool)
+        for _ in range(max_iterations):
+            points = origin + travelled[:, None] * directions
+            cols = np.minimum(np.maximum(((points[:, 0] - ox) // res).astype(np.int64), 0), self.cols - 1)
+            rows = np.minimum(np.maximum(((points[:, 1] - oy) // res).astype(np.int64), 0), self.rows - 1)
+            step = self.distance[rows, cols] - self.slack
+            active &= step > res
+            travelled = np.where(active, travelled + step, travelled)
+            clear |= active & (travelled > lengths)
+            active &= ~clear
+            if not active.any():
+                break
+        return clear
@@ -1,9 +1,11 @@
+from collections import namedtuple
 from game import Game
-import pygame
+
+EnvSnapshot = namedtuple('EnvSnapshot', ['game', 'current_step'])
 
 class PlayerEnv:
-    def __init__(self):
-        self.game = Game()
+    def __init__(self, seed=None):
+        self.game = Game(seed)
         self.current_step = 0
         self.max_steps = 1000
 
@@ -20,8 +22,17 @@ class PlayerEnv:
 
         return state, reward, done
 
-    def render(self, surface):
-        self.game.render(surface)
+    def snapshot(self):
+        return EnvSnapshot(self.game.snapshot(), self.current_step)
+
+    def restore(self, snapshot):
+        self.game.restore(snapshot.game)
+        self.current_step = snapshot.current_step
+
+    def render(self, surface, dirty=False):
+        return self.game.render(surface, dirty)
 
     def set_level(self, level_name):
-        self.game.set_level(level_name)
\ No newline at end of file
+        # Starts a new episode on the level, like reset()
+        self.current_step = 0
+        return self.game.set_level(level_name)
\ No newline at end of file
@@ -1,5 +1,7 @@
 import pygame
 from player_env import PlayerEnv
+from frame_scheduler import FrameScheduler
+from text_cache import render_text
 
 class PlayerMode:
     def __init__(self, screen, font, game):
@@ -24,11 +26,12 @@ class PlayerMode:
 
         back_button = pygame.Rect(10, self.screen.get_height() - 60, 180, 40)
 
+        scheduler = FrameScheduler()
         while True:
             self.screen.fill((0, 0, 0))
             self.draw_text('Select Level', (self.screen.get_width() // 2, 50))
 
-            for event in pygame.event.get():
+            for event in scheduler.wait_events():
                 if event.type == pygame.QUIT:
                     return None
                 if event.type == pygame.MOUSEBUTTONDOWN:
@@ -60,7 +63,7 @@ class PlayerMode:
             pygame.draw.rect(self.screen, (100, 100, 100), back_button)
             self.draw_text("Back", back_button.center)
 
-            pygame.display.flip()
+            scheduler.flip()
 
     def play_level(self, level):
         self.env.set_level(level)
@@ -69,6 +72,8 @@ class PlayerMode:
 
         back_button = pygame.Rect(10, self.screen.get_height() - 60, 180, 40)
 
+        # The game advances at a fixed 60 ticks per second, whatever the frame rate
+        scheduler = FrameScheduler(tick_rate=60, fps=60)
         while True:
             for event in pygame.event.get():
                 if event.type == pygame.QUIT:
@@ -89,8 +94,13 @@ class PlayerMode:
                 action = 3
 
             if action != -1:
-                state, reward, done = self.env.step(action)
-                total_reward += reward
+                for _ in range(scheduler.ticks()):
+                    state, reward, done = self.env.step(action)
+                    total_reward += reward
+                    if done:
+                        break
+            else:
+                scheduler.restart()
 
             self.screen.fill((0, 0, 0))
             self.env.render(self.screen)
@@ -100,7 +110,7 @@ class PlayerMode:
             pygame.draw.rect(self.screen, (100, 100, 100), back_button)
             self.draw_text("Back", back_button.center)
 
-            pygame.display.flip()
+            scheduler.flip()
 
             if done:
                 break
@@ -115,12 +125,13 @@ class PlayerMode:
 
         back_button = pygame.Rect(10, self.screen.get_height() - 60, 180, 40)
 
+        scheduler = FrameScheduler()
         while True:
             self.screen.fill((0, 0, 0))
             self.draw_text('Game Over', (self.screen.get_width() // 2, 100))
             self.draw_text(f'Total Reward: {total_reward:.2f}', (self.screen.get_width() // 2, 200))
 
-            for event in pygame.event.get():
+            for event in scheduler.wait_events():
                 if event.type == pygame.QUIT:
                     return None
                 if event.type == pygame.MOUSEBUTTONDOWN:
@@ -140,9 +151,9 @@ class PlayerMode:
             pygame.draw.rect(self.screen, (100, 100, 100), back_button)
             self.draw_text("Back to Menu", back_button.center)
 
-            pygame.display.flip()
+            scheduler.flip()
 
     def draw_text(self, text, position):
-        text_surface = self.font.render(text, True, (255, 255, 255))
+        text_surface = render_text(text, (255, 255, 255), self.font)
         text_rect = text_surface.get_rect(center=position)
         self.screen.blit(text_surface, text_rect)
\ No newline at end of file
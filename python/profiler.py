@@ -0,0 +1,130 @@
+import os
+import json
+import time
+import cProfile
+import pstats
+import tracemalloc
+from collections import deque
+import numpy as np
+
+
+class _NullSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    __slots__ = ('samples', 'start')
+
+    def __init__(self, samples):
+        self.samples = samples
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.samples.append(time.perf_counter() - self.start)
+        return False
+
+
+class Profiler:
+    # Named timing spans and counters. Each span keeps its last `window`
+    # durations for p50/p95/max figures. Disabled, span() returns a shared
+    # no-op context manager and count() returns at once.
+    # A span object is reused for its name, so a span must not be nested in
+    # itself nor entered from two threads at once.
+    def __init__(self, enabled=False, window=1000):
+        self.enabled = enabled
+        self.window = window
+        self.spans = {}
+        self.counters = {}
+        self.capture = None
+        self.capture_folder = "profiles"
+
+    def span(self, name):
+        if not self.enabled:
+            return _NULL_SPAN
+        span = self.spans.get(name)
+        if span is None:
+            span = self.spans[name] = _Span(deque(maxlen=self.window))
+        return span
+
+    def count(self, name, n=1):
+        if self.enabled:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def reset(self):
+        self.spans.clear()
+        self.counters.clear()
+
+    def stats(self):
+        stats = {}
+        for name, span in list(self.spans.items()):
+            samples = np.array(span.samples) * 1000
+            if not len(samples):
+                continue
+            p50, p95 = np.percentile(samples, [50, 95])
+            stats[name] = {'count': len(samples), 'mean_ms': float(samples.mean()), 'p50_ms': float(p50),
+                           'p95_ms': float(p95), 'max_ms': float(samples.max())}
+        return stats
+
+    def summary_lines(self):
+        # One short line per span, p50/p95/max in milliseconds, then the counters
+        return ([f"{name}: {s['p50_ms']:.3g}/{s['p95_ms']:.3g}/{s['max_ms']:.3g}"
+                 for name, s in self.stats().items()] +
+                [f"{name}: {value}" for name, value in self.counters.items()])
+
+    def export(self, filepath):
+        os.makedirs(os.path.dirname(filepath) or '.', exist_ok=True)
+        with open(filepath, 'w') as f:
+            json.dump({'time': time.strftime('%Y-%m-%dT%H:%M:%S'), 'spans': self.stats(),
+                       'counters': self.counters}, f, indent=2)
+
+    @property
+    def capturing(self):
+        return self.capture is not None
+
+    def start_capture(self, duration=None):
+        # cProfile (calling thread only) and tracemalloc until stop_capture(),
+        # or until poll_capture() sees duration seconds have passed
+        if self.capture is not None:
+            return
+        tracemalloc.start()
+        profile = cProfile.Profile()
+        self.capture = (profile, time.perf_counter(), duration)
+        profile.enable()
+
+    def poll_capture(self):
+        if self.capture is not None and self.capture[2] is not None:
+            if time.perf_counter() - self.capture[1] >= self.capture[2]:
+                return self.stop_capture()
+        return None
+
+    def stop_capture(self):
+        # Writes <folder>/capture-<time>.prof (for pstats/snakeviz) and a
+        # -memory.txt with the top allocation sites; returns the .prof path
+        if self.capture is None:
+            return None
+        profile = self.capture[0]
+        profile.disable()
+        snapshot = tracemalloc.take_snapshot()
+        tracemalloc.stop()
+        self.capture = None
+
+        os.makedirs(self.capture_folder, exist_ok=True)
+        base = os.path.join(self.capture_folder, f"capture-{time.strftime('%Y%m%d-%H%M%S')}")
+        profile.dump_stats(base + ".prof")
+        with open(base + "-memory.txt", 'w') as f:
+            for stat in snapshot.statistics('lineno')[:30]:
+                f.write(f"{stat}\n")
+        print(f"Profile capture saved to {base}.prof")
+        pstats.Stats(profile).sort_stats('cumulative').print_stats(15)
+        return base + ".prof"
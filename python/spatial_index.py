@@ -0,0 +1,104 @@
+import math
+import numpy as np
+
+
+class UniformGrid:
+    # Static bucket grid over wall rects. Each wall is registered in every cell
+    # its closed rect touches, so any point on a wall is found through the cell
+    # that contains it.
+    def __init__(self, rects, width, height, cell_size=50, margin=0):
+        rects = np.asarray(rects, dtype=np.float64).reshape(-1, 4)
+        # Normalize negative sizes the way pygame.Rect collisions treat them
+        x = np.minimum(rects[:, 0], rects[:, 0] + rects[:, 2])
+        y = np.minimum(rects[:, 1], rects[:, 1] + rects[:, 3])
+        self.rects = np.stack((x, y, np.abs(rects[:, 2]), np.abs(rects[:, 3])), axis=1)
+        self.cell_size = cell_size
+
+        left, top = -margin, -margin
+        right, bottom = width + margin, height + margin
+        if len(self.rects):
+            left = min(left, self.rects[:, 0].min())
+            top = min(top, self.rects[:, 1].min())
+            right = max(right, (self.rects[:, 0] + self.rects[:, 2]).max())
+            bottom = max(bottom, (self.rects[:, 1] + self.rects[:, 3]).max())
+        self.origin = (left, top)
+        self.cols = int(math.floor((right - left) / cell_size)) + 1
+        self.rows = int(math.floor((bottom - top) / cell_size)) + 1
+
+        buckets = [[] for _ in range(self.cols * self.rows)]
+        for i, (rx, ry, rw, rh) in enumerate(self.rects):
+            if rw == 0 or rh == 0:
+                continue
+            col0, row0 = self._cell(rx, ry)
+            col1, row1 = self._cell(rx + rw, ry + rh)
+            for row in range(row0, row1 + 1):
+                for col in range(col0, col1 + 1):
+                    buckets[row * self.cols + col].append(i)
+        self.cells = [np.array(bucket, dtype=np.int64) for bucket in buckets]
+
+    def _cell(self, x, y):
+        col = int((x - self.origin[0]) // self.cell_size)
+        row = int((y - self.origin[1]) // self.cell_size)
+        return min(max(col, 0), self.cols - 1), min(max(row, 0), self.rows - 1)
+
+    def _gather(self, cell_ids):
+        buckets = [self.cells[i] for i in cell_ids if len(self.cells[i])]
+        if not buckets:
+            return np.empty(0, dtype=np.int64)
+        return np.unique(np.concatenate(buckets))
+
+    def query_rect(self, x, y, width, height):
+        col0, row0 = self._cell(x, y)
+        col1, row1 = self._cell(x + width, y + height)
+        return self._gather([row * self.cols + col
+                             for row in range(row0, row1 + 1)
+                             for col in range(col0, col1 + 1)])
+
+    def collides(self, rect):
+        # Same strict-overlap rule as pygame.Rect.colliderect
+        x, y, width, height = rect
+        if width == 0 or height == 0:
+            return False
+        candidates = self.rects[self.query_rect(x, y, width, height)]
+        if not len(candidates):
+            return False
+        cx, cy, cw, ch = candidates.T
+        return bool(np.any((x < cx + cw) & (cx < x + width) & (y < cy + ch) & (cy < y + height)))
+
+    def traverse(self, x0, y0, x1, y1):
+        # DDA walk (Amanatides & Woo) over every cell the segment passes through
+        cell_size = self.cell_size
+        col, row = self._cell(x0, y0)
+        dx, dy = x1 - x0, y1 - y0
+        step_col = 1 if dx > 0 else -1
+        step_row = 1 if dy > 0 else -1
+        if dx != 0:
+            next_x = self.origin[0] + (col + (dx > 0)) * cell_size
+            t_max_x, t_delta_x = (next_x - x0) / dx, cell_size / abs(dx)
+        else:
+            t_max_x = t_delta_x = math.inf
+        if dy != 0:
+            next_y = self.origin[1] + (row + (dy > 0)) * cell_size
+            t_max_y, t_delta_y = (next_y - y0) / dy, cell_size / abs(dy)
+        else:
+            t_max_y = t_delta_y = math.inf
+
+        cells = [row * self.cols + col]
+        while min(t_max_x, t_max_y) <= 1:
+            if t_max_x < t_max_y:
+                col += step_col
+                t_max_x += t_delta_x
+            else:
+                row += step_row
+                t_max_y += t_delta_y
+            if not (0 <= col < self.cols and 0 <= row < self.rows):
+                break
+            cells.append(row * self.cols + col)
+        return cells
+
+    def ray_candidates(self, origin, ray_vectors):
+        x0, y0 = origin
+        cells = set()
+        for vx, vy in ray_vectors:
+            cells.update(self.traverse(x0, y0, x0 + vx, y0 + vy))
+        return self._gather(cells)
@@ -0,0 +1,181 @@
+import multiprocessing as mp
+import traceback
+import numpy as np
+from multiprocessing import shared_memory
+
+OBS_DIM = 10
+
+# name -> (dtype, trailing shape) of every buffer shared with the workers
+_BUFFERS = {
+    'obs': (np.float64, (OBS_DIM,)),
+    'rewards': (np.float64, ()),
+    'dones': (np.bool_, ()),
+    'actions': (np.int64, ()),
+}
+
+
+def _attach(name):
+    # Workers only borrow the segments, the parent owns and unlinks them.
+    # Before Python 3.13 attaching registers the segment again with the
+    # resource tracker shared with the parent, which is harmless.
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        return shared_memory.SharedMemory(name=name)
+
+
+def _views(segments, num_envs):
+    return {key: np.ndarray((num_envs,) + shape, dtype=dtype, buffer=segments[key].buf)
+            for key, (dtype, shape) in _BUFFERS.items()}
+
+
+def _prepare_levels(level_names):
+    # Compiles every level and builds the occupancy grids of level_names once
+    # in the parent, so workers find them in the level cache (or in memory
+    # when forked) instead of each compiling and writing the same files
+    from game import Game
+
+    game = Game()
+    for level_name in level_names or ():
+        game.set_level(level_name)
+
+
+def _worker(conn, names, num_envs, env_ids, seeds):
+    from player_env import PlayerEnv
+
+    segments = {key: _attach(name) for key, name in names.items()}
+    buffers = _views(segments, num_envs)
+    obs, rewards, dones, actions = buffers['obs'], buffers['rewards'], buffers['dones'], buffers['actions']
+    envs = dict(zip(env_ids, (PlayerEnv(seed) for seed in seeds)))
+    try:
+        while True:
+            cmd, data = conn.recv()
+            try:
+                if cmd == 'step':
+                    # Finished envs are reset right away, like VectorPlayerEnv
+                    auto_reset, _ = data
+                    for i, env in envs.items():
+                        state, reward, done = env.step(int(actions[i]))
+                        if done and auto_reset:
+                            state, _, _ = env.reset()
+                        obs[i], rewards[i], dones[i] = state, reward, done
+                elif cmd == 'reset':
+                    for i in data:
+                        obs[i] = envs[i].reset()[0]
+                elif cmd == 'set_level':
+                    level_name, ids = data
+                    for i in ids:
+                        obs[i] = envs[i].set_level(level_name)[0]
+                elif cmd == 'close':
+                    conn.send(None)
+                    break
+                conn.send(None)
+            except Exception:
+                conn.send(traceback.format_exc())
+    finally:
+        del obs, rewards, dones, actions, buffers
+        for segment in segments.values():
+            segment.close()
+        conn.close()
+
+
+class SubprocVectorEnv:
+    # Runs num_envs PlayerEnvs split across num_workers processes. Actions,
+    # observations, rewards and dones live in shared memory; the pipes only
+    # carry the command names and acknowledgements. The API follows
+    # VectorPlayerEnv: finished envs are reset inside step(). levels names
+    # the levels the envs will be set to, prepared before the workers start.
+    def __init__(self, num_envs, num_workers=None, seed=None, levels=None):
+        self.num_envs = num_envs
+        self.num_workers = min(num_workers or mp.cpu_count(), num_envs)
+        self.closed = False
+
+        self.segments = {}
+        for key, (dtype, shape) in _BUFFERS.items():
+            nbytes = max(num_envs * int(np.prod(shape, dtype=np.int64)) * np.dtype(dtype).itemsize, 1)
+            self.segments[key] = shared_memory.SharedMemory(create=True, size=nbytes)
+        self.buffers = _views(self.segments, num_envs)
+        for buffer in self.buffers.values():
+            buffer[...] = 0
+        names = {key: segment.name for key, segment in self.segments.items()}
+
+        _prepare_levels(levels)
+        seeds = np.random.SeedSequence(seed).spawn(num_envs)
+        self.worker_envs = np.array_split(np.arange(num_envs), self.num_workers)
+        self.conns = []
+        self.processes = []
+        for env_ids in self.worker_envs:
+            parent_conn, child_conn = mp.Pipe()
+            process = mp.Process(target=_worker, daemon=True,
+                                 args=(child_conn, names, num_envs, env_ids.tolist(), [seeds[i] for i in env_ids]))
+            process.start()
+            child_conn.close()
+            self.conns.append(parent_conn)
+            self.processes.append(process)
+
+    def _env_ids(self, env_ids):
+        if env_ids is None:
+            return np.arange(self.num_envs)
+        return np.atleast_1d(np.asarray(env_ids, dtype=np.int64))
+
+    def _call(self, cmd, env_ids=None, data=None):
+        # Sends the command to every worker owning one of env_ids, then waits
+        # for all of them so they run concurrently
+        if self.closed:
+            raise RuntimeError("SubprocVectorEnv is closed")
+        env_ids = self._env_ids(env_ids)
+        busy = []
+        for conn, worker_envs in zip(self.conns, self.worker_envs):
+            ids = np.intersect1d(worker_envs, env_ids).tolist()
+            if ids:
+                conn.send((cmd, (data, ids) if data is not None else ids))
+                busy.append(conn)
+        errors = [error for error in (conn.recv() for conn in busy) if error is not None]
+        if errors:
+            raise RuntimeError(f"Environment worker failed:\n{errors[0]}")
+
+    def _results(self):
+        return self.buffers['obs'].copy(), self.buffers['rewards'].copy(), self.buffers['dones'].copy()
+
+    def reset(self, env_ids=None):
+        self._call('reset', env_ids)
+        return self.buffers['obs'].copy()
+
+    def step(self, actions, auto_reset=True):
+        self.buffers['actions'][:] = actions
+        self._call('step', data=auto_reset)
+        return self._results()
+
+    def set_level(self, level_name, env_ids=None):
+        self._call('set_level', env_ids, level_name)
+        return self.buffers['obs'].copy()
+
+    def close(self):
+        if self.closed:
+            return
+        for conn in self.conns:
+            try:
+                conn.send(('close', None))
+                conn.recv()
+            except (BrokenPipeError, EOFError):
+                pass
+            conn.close()
+        for process in self.processes:
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+        self.closed = True
+        self.buffers = None
+        for segment in self.segments.values():
+            segment.close()
+            segment.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __del__(self):
+        if not getattr(self, 'closed', True):
+            self.close()
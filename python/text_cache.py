@@ -0,0 +1,52 @@
+from collections import OrderedDict
+import pygame
+
+# Rendered text surfaces kept around, least recently used dropped first
+MAX_SURFACES = 512
+
+_fonts = {}
+_surfaces = OrderedDict()
+
+
+def get_font(size=24, name=None):
+    # One Font per (name, size) for the whole app; name None is pygame's default font
+    key = (name, size)
+    font = _fonts.get(key)
+    if font is None:
+        font = _fonts[key] = pygame.font.Font(name, size)
+    return font
+
+
+def render_text(text, color, font=None, antialias=True, cache=True):
+    # Same as font.render, but a string drawn again with the same font and
+    # color reuses its surface. Callers must not draw on the returned surface.
+    # Strings unlikely to be drawn again pass cache=False to stay out of the LRU.
+    if font is None:
+        font = get_font()
+    if not cache:
+        return font.render(text, antialias, color)
+    key = (text, font, tuple(color), antialias)
+    surface = _surfaces.get(key)
+    if surface is not None:
+        _surfaces.move_to_end(key)
+        return surface
+    surface = _surfaces[key] = font.render(text, antialias, color)
+    if len(_surfaces) > MAX_SURFACES:
+        _surfaces.popitem(last=False)
+    return surface
+
+
+class TextSlots:
+    # Text that changes often, like stat values or live labels, kept out of
+    # the LRU: each slot holds its last string and surface and re-renders
+    # only when the string changes.
+    def __init__(self, color, font=None):
+        self.color = color
+        self.font = font
+        self.slots = {}
+
+    def render(self, slot, text):
+        cached = self.slots.get(slot)
+        if cached is None or cached[0] != text:
+            cached = self.slots[slot] = (text, render_text(text, self.color, self.font, cache=False))
+        return cached[1]
@@ -0,0 +1,142 @@
+import argparse
+import os
+import time
+import numpy as np
+from vector_game import VectorPlayerEnv
+from subproc_env import SubprocVectorEnv
+from agents.ppo import Agent
+from agents.async_learner import AsyncLearner
+from curriculum import CurriculumScheduler
+from profiler import Profiler
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Train a PPO agent without any display")
+    parser.add_argument('--levels', nargs='+',
+                        help="level names from levelsdata/, spread round-robin over the envs")
+    parser.add_argument('--curriculum',
+                        help="curriculum file or name in curriculadata/, picking each episode's level")
+    parser.add_argument('--steps', type=int, default=1_000_000, help="total environment steps")
+    parser.add_argument('--num-envs', type=int, default=8)
+    parser.add_argument('--workers', type=int, default=0,
+                        help="worker processes stepping the envs, 0 steps them in this process")
+    parser.add_argument('--rollout', type=int, default=1024, help="steps per env between two learn steps")
+    parser.add_argument('--gamma', type=float, default=0.99)
+    parser.add_argument('--alpha', type=float, default=0.0003)
+    parser.add_argument('--gae-lambda', type=float, default=0.55)
+    parser.add_argument('--policy-clip', type=float, default=0.1)
+    parser.add_argument('--batch-size', type=int, default=1024)
+    parser.add_argument('--epochs', type=int, default=4)
+    parser.add_argument('--shared', action='store_true', help="use the shared-trunk actor-critic")
+    parser.add_argument('--checkpoint-dir', default="models_data")
+    parser.add_argument('--name', default="train", help="checkpoint name, saved as <name>_actor.pth...")
+    parser.add_argument('--load', help="checkpoint name to resume from")
+    parser.add_argument('--save-every', type=int, default=10, help="learn steps between checkpoints")
+    parser.add_argument('--log-every', type=float, default=5.0, help="seconds between log lines")
+    parser.add_argument('--seed', type=int)
+    parser.add_argument('--profile', help="JSON file receiving per-phase timings, rewritten at every log line")
+    args = parser.parse_args(argv)
+    if not args.levels and not args.curriculum:
+        parser.error("one of --levels or --curriculum is required")
+    return args
+
+
+def make_env(args, curriculum=None):
+    if args.workers > 0:
+        levels = list(curriculum.levels) if curriculum is not None else args.levels
+        env = SubprocVectorEnv(args.num_envs, args.workers, seed=args.seed, levels=levels)
+    else:
+        env = VectorPlayerEnv(args.num_envs, seed=args.seed)
+    if curriculum is not None:
+        curriculum.assign(env)
+    else:
+        for i, level_name in enumerate(args.levels):
+            env.set_level(level_name, np.arange(i, args.num_envs, len(args.levels)))
+    return env
+
+
+def train(args):
+    if args.seed is not None:
+        np.random.seed(args.seed)
+
+    agent = Agent(nb_actions=4, input_dims=(10,), gamma=args.gamma, alpha=args.alpha, gae_lambda=args.gae_lambda,
+                  policy_clip=args.policy_clip, batch_size=args.batch_size, N=args.rollout,
+                  nb_epochs=args.epochs, num_envs=args.num_envs, shared=args.shared)
+    agent.models_dir = args.checkpoint_dir
+    os.makedirs(args.checkpoint_dir, exist_ok=True)
+    if args.load:
+        agent.load_models(args.load)
+    profiler = Profiler(enabled=bool(args.profile))
+    learner = AsyncLearner(agent, profiler)
+
+    curriculum = None
+    if args.curriculum:
+        curriculum = CurriculumScheduler.load(args.curriculum, seed=args.seed)
+    env = make_env(args, curriculum)
+    try:
+        state = env.reset()
+        episode_rewards = np.zeros(args.num_envs)
+        finished_rewards = []
+        episodes = 0
+        time_steps = 0
+        start_time = last_log = time.time()
+        last_steps = 0
+
+        while time_steps < args.steps:
+            with profiler.span('action'):
+                actions, probs, vals = learner.choose_actions(state)
+            with profiler.span('step'):
+                # With a curriculum, finished envs are reset once, by
+                # curriculum.assign switching them to their next level
+                next_state, rewards, dones = env.step(actions, auto_reset=curriculum is None)
+            with profiler.span('remember'):
+                learner.remember(state, actions, probs, vals, rewards, dones)
+            state = next_state
+            time_steps += args.num_envs
+            profiler.count('env_steps', args.num_envs)
+
+            episode_rewards += rewards
+            if dones.any():
+                episodes += int(dones.sum())
+                profiler.count('episodes', int(dones.sum()))
+                finished_rewards.extend(episode_rewards[dones].tolist())
+                episode_rewards[dones] = 0
+                if curriculum is not None:
+                    curriculum.record_episodes(int(dones.sum()))
+                    with profiler.span('curriculum'):
+                        state = curriculum.assign(env, np.flatnonzero(dones))
+
+            if len(learner.policy.memory) == args.rollout:
+                learner.end_rollout()
+                if learner.learning_steps and learner.learning_steps % args.save_every == 0:
+                    learner.save_policy(args.name)
+
+            now = time.time()
+            if now - last_log >= args.log_every:
+                mean_reward = np.mean(finished_rewards) if finished_rewards else float('nan')
+                print(f"steps {time_steps} | {(time_steps - last_steps) / (now - last_log):.0f} steps/s | "
+                      f"episodes {episodes} | mean reward {mean_reward:.2f} | learn steps {learner.learning_steps} | "
+                      f"actor loss {agent.actor_loss:.4f} | critic loss {agent.critic_loss:.4f}" +
+                      (f" | curriculum step {curriculum.step_index + 1}" if curriculum is not None else ""))
+                finished_rewards = []
+                last_log, last_steps = now, time_steps
+                if args.profile:
+                    profiler.export(args.profile)
+
+        learner.save_models(args.name)
+        if args.profile:
+            learner.sync()
+            profiler.export(args.profile)
+        elapsed = time.time() - start_time
+        print(f"Trained {time_steps} steps in {elapsed:.1f}s ({time_steps / elapsed:.0f} steps/s)")
+    finally:
+        if args.workers > 0:
+            env.close()
+
+
+def main(argv=None):
+    train(parse_args(argv))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,179 @@
+import numpy as np
+from game import SCREEN_WIDTH, SCREEN_HEIGHT, WITH_BORDERS, default_level
+from level_compiler import load_compiled_levels
+from raycast import cast_rays
+
+PLAYER_SIZE = 10
+PLAYER_SPEED = 4
+GOAL_RADIUS = 7
+
+# dx, dy per action: right, left, up, down (anything else stands still)
+ACTION_MOVES = np.array([[PLAYER_SPEED, 0], [-PLAYER_SPEED, 0], [0, -PLAYER_SPEED], [0, PLAYER_SPEED], [0, 0]])
+
+
+class VectorGame:
+    # N copies of Game stored as struct-of-arrays. Every buffer is indexed by env
+    # first, and envs sharing a level share its CompiledLevel.
+    def __init__(self, num_envs, levels=None, levels_folder="levelsdata", seed=None):
+        self.num_envs = num_envs
+        self.width, self.height = SCREEN_WIDTH, SCREEN_HEIGHT
+        if levels is None:
+            levels = load_compiled_levels(levels_folder, self.width, self.height, WITH_BORDERS)
+        self.levels = levels
+
+        self.raycast_dist = 75
+        self.num_rays = 8
+        self.ray_angles = np.linspace(0, 2 * np.pi, self.num_rays, endpoint=False)
+        self.ray_vectors = np.stack((np.cos(self.ray_angles), np.sin(self.ray_angles)), axis=1) * self.raycast_dist
+
+        # Like Game, envs play an empty default level until set_level is called
+        self.default_level = default_level(self.width, self.height)
+        self.env_levels = [None] * num_envs
+        self.player_pos = np.zeros((num_envs, 2), dtype=np.int64)
+        self.goal_pos = np.zeros((num_envs, self.default_level.nb_goals, 2), dtype=np.int64)
+        self.goal_alive = np.zeros((num_envs, self.default_level.nb_goals), dtype=bool)
+        self.ray_distances = np.zeros((num_envs, self.num_rays))
+        self.ray_endpoints = np.zeros((num_envs, self.num_rays, 2))
+        self.rewards = np.zeros(num_envs)
+        self.dones = np.zeros(num_envs, dtype=bool)
+        self.rngs = [None] * num_envs
+        self.seed(seed)
+
+    def _env_ids(self, env_ids):
+        if env_ids is None:
+            return np.arange(self.num_envs)
+        return np.atleast_1d(np.asarray(env_ids, dtype=np.int64))
+
+    def seed(self, seed=None, env_ids=None):
+        # seed is either one seed for all the selected envs, each getting an
+        # independent stream spawned from it, or a sequence of per-env seeds
+        env_ids = self._env_ids(env_ids)
+        if seed is None or np.ndim(seed) == 0:
+            seeds = np.random.SeedSequence(seed).spawn(len(env_ids))
+        else:
+            seeds = list(seed)
+            if len(seeds) != len(env_ids):
+                raise ValueError(f"Expected {len(env_ids)} seeds, got {len(seeds)}")
+        for i, env_seed in zip(env_ids, seeds):
+            self.rngs[i] = np.random.default_rng(env_seed)
+
+    def _level_groups(self, env_ids=None):
+        groups = {}
+        for i in self._env_ids(env_ids).tolist():
+            groups.setdefault(self.env_levels[i], []).append(i)
+        return [(self.levels[name] if name is not None else self.default_level, np.array(ids))
+                for name, ids in groups.items()]
+
+    def set_level(self, level_name, env_ids=None):
+        if level_name not in self.levels:
+            raise ValueError(f"Level '{level_name}' not found")
+        level = self.levels[level_name]
+        for i in self._env_ids(env_ids):
+            self.env_levels[i] = level_name
+        if level.nb_goals > self.goal_pos.shape[1]:
+            extra = level.nb_goals - self.goal_pos.shape[1]
+            self.goal_pos = np.pad(self.goal_pos, ((0, 0), (0, extra), (0, 0)))
+            self.goal_alive = np.pad(self.goal_alive, ((0, 0), (0, extra)))
+        return self.reset(env_ids)
+
+    def reset(self, env_ids=None):
+        # Like Game.reset, rays are not recast here so the first observation of
+        # an episode carries the rays of the previous one.
+        for level, ids in self._level_groups(env_ids):
+            sampler = level.zone_sampler(self.width, self.height)
+            nb_zones = len(sampler)
+            self.player_pos[ids] = (level.spawn[0] + 3, level.spawn[1] + 3)
+            self.goal_alive[ids] = False
+            self.goal_pos[ids, :nb_zones] = sampler.sample_batch([self.rngs[i] for i in ids])
+            self.goal_pos[ids, nb_zones:level.nb_goals] = np.array(level.rewards, dtype=np.int64).reshape(-1, 2)
+            self.goal_alive[ids, :level.nb_goals] = True
+        return self._get_state()
+
+    def step(self, actions):
+        actions = np.asarray(actions, dtype=np.int64)
+        moves = ACTION_MOVES[np.where((actions >= 0) & (actions < 4), actions, 4)]
+        self.player_pos += moves
+        np.clip(self.player_pos[:, 0], 0, self.width - PLAYER_SIZE, out=self.player_pos[:, 0])
+        np.clip(self.player_pos[:, 1], 0, self.height - PLAYER_SIZE, out=self.player_pos[:, 1])
+        self._cast_rays()
+
+        px, py = self.player_pos[:, 0], self.player_pos[:, 1]
+        collided = np.zeros(self.num_envs, dtype=bool)
+        for level, ids in self._level_groups():
+            wx, wy, ww, wh = level.rects.T
+            x, y = px[ids, None], py[ids, None]
+            overlap = ((x < wx + ww) & (wx < x + PLAYER_SIZE) &
+                       (y < wy + wh) & (wy < y + PLAYER_SIZE) & (ww != 0) & (wh != 0))
+            collided[ids] = overlap.any(axis=1)
+
+        gx, gy = self.goal_pos[..., 0] - GOAL_RADIUS, self.goal_pos[..., 1] - GOAL_RADIUS
+        touching = (self.goal_alive &
+                    (px[:, None] < gx + 2 * GOAL_RADIUS) & (gx < px[:, None] + PLAYER_SIZE) &
+                    (py[:, None] < gy + 2 * GOAL_RADIUS) & (gy < py[:, None] + PLAYER_SIZE))
+        reached = ~collided & touching.any(axis=1)
+        reached_ids = np.flatnonzero(reached)
+        self.goal_alive[reached_ids, touching[reached_ids].argmax(axis=1)] = False
+        finished = reached & ~self.goal_alive.any(axis=1)
+
+        self.rewards[:] = -0.1
+        self.rewards[reached] = 25.0
+        self.rewards[finished] = 50.0
+        self.rewards[collided] = -50.0
+        self.dones[:] = collided | finished
+        return self._get_state(), self.rewards.copy(), self.dones.copy()
+
+    def _cast_rays(self):
+        origins = self.player_pos + PLAYER_SIZE // 2
+        for level, ids in self._level_groups():
+            fractions = cast_rays(origins[ids], self.ray_vectors, level.edge_starts, level.edge_vectors)
+            hit = np.isfinite(fractions)
+            travelled = np.where(hit, fractions, 1.0)
+            self.ray_distances[ids] = np.where(hit, 1 - travelled, 0.0)
+            self.ray_endpoints[ids] = origins[ids, None, :] + travelled[..., None] * self.ray_vectors
+
+    def _get_state(self):
+        center = self.player_pos + PLAYER_SIZE // 2
+        has_goal = self.goal_alive.any(axis=1)
+        first_goal = self.goal_pos[np.arange(self.num_envs), self.goal_alive.argmax(axis=1)] if self.goal_pos.shape[1] else np.zeros_like(center)
+        goal = np.where(has_goal[:, None], first_goal, 0)
+
+        player_to_goal = goal - center
+        distance = np.sqrt(player_to_goal[:, 0]**2 + player_to_goal[:, 1]**2)
+        normalized_distance = distance / np.sqrt(SCREEN_WIDTH**2 + SCREEN_HEIGHT**2)
+
+        angle = np.arctan2(player_to_goal[:, 1], player_to_goal[:, 0])
+        normalized_angle = (angle + np.pi) / (2 * np.pi)
+
+        return np.concatenate((normalized_angle[:, None], normalized_distance[:, None], self.ray_distances), axis=1)
+
+
+class VectorPlayerEnv:
+    # Batched counterpart of PlayerEnv. Finished envs are reset inside step()
+    # and the observation returned for them is the first one of the new episode.
+    # With auto_reset=False they are left for the caller to reset or set_level.
+    def __init__(self, num_envs, levels=None, seed=None):
+        self.game = VectorGame(num_envs, levels, seed=seed)
+        self.num_envs = num_envs
+        self.current_step = np.zeros(num_envs, dtype=np.int64)
+        self.max_steps = 1000
+
+    def reset(self, env_ids=None):
+        self.current_step[self.game._env_ids(env_ids)] = 0
+        return self.game.reset(env_ids)
+
+    def step(self, actions, auto_reset=True):
+        self.current_step += 1
+        state, reward, done = self.game.step(actions)
+
+        timeout = self.current_step >= self.max_steps
+        reward[timeout] = -75.0
+        done |= timeout
+
+        done_ids = np.flatnonzero(done)
+        if len(done_ids) and auto_reset:
+            state = self.reset(done_ids)
+        return state, reward, done
+
+    def set_level(self, level_name, env_ids=None):
+        self.current_step[self.game._env_ids(env_ids)] = 0
+        return self.game.set_level(level_name, env_ids)